@@ -0,0 +1,78 @@
+import re
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.synthetic import make_sheet_csv
+
+# ================== 로컬 gviz 대역 서버 ==================
+# /spreadsheets/d/<sheet_id>/gviz/tq?tqx=out:csv 요청에 가짜 시트 CSV 를 돌려줌
+# lms_sheets.GVIZ_CSV_URL 을 url_template 으로 바꾸면 앱 코드가 그대로 이 서버를 읽음
+_PATH_RE = re.compile(r"^/spreadsheets/d/([^/]+)/gviz/tq\?(?:.*&)?tqx=out:csv")
+
+
+class GvizServer:
+    def __init__(self, days, latency=0.0):
+        self.days = days
+        self.latency = latency
+        self.requests = 0
+        self._csv = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = None
+
+    # 같은 시트는 한 번만 만들어 두고 재사용 (서버 쪽 비용이 측정에 섞이지 않도록)
+    def sheet_csv(self, sheet_id):
+        with self._lock:
+            body = self._csv.get(sheet_id)
+        if body is None:
+            # 바이트 합은 id 끼리 많이 겹쳐(-00001 / -00010) 학생마다 다른 시트가 나오도록 crc32 사용
+            body = make_sheet_csv(zlib.crc32(sheet_id.encode()), self.days)
+            with self._lock:
+                self._csv[sheet_id] = body
+        return body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                m = _PATH_RE.match(self.path)
+                if m is None:
+                    self.send_error(404)
+                    return
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                body = server.sheet_csv(m.group(1))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url_template(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/spreadsheets/d/{{sheet_id}}/gviz/tq?tqx=out:csv"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,193 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import lms_sheets
+import lms_store
+from bench.gviz_server import GvizServer
+from bench.synthetic import make_sheet, make_sheet_csv, make_students
+from lms_calendar import WEEK_TABLE, add_week_columns
+from lms_charts import goal_actual_figure, stacked_bar_figure
+from lms_config import ALL_VARS, HOUR_COLS, SEMESTER_START
+from lms_export import EXPORT_FORMATS, export_report
+from lms_frames import memory_report, student_frame
+from lms_ranks import build_rank_history
+from lms_report import build_report, sync_students
+from lms_stats import build_panel, cohort_cube, goal_record, rolling_trends, weekly_stats
+
+# ================== 벤치마크 실행 ==================
+# 예) python -m bench.run --students 200 --days 120 --json bench_output.json
+#     python -m bench.run --compare bench_output.json   (이전 결과 대비 배율 표시)
+
+
+# bench.synthetic.make_students 의 dict 를 AccountIndex 처럼 조회
+class BenchIndex:
+    def __init__(self, students):
+        self._sheets = {acc["id"]: {"sheet_id": acc["sheet_id"]} for acc in students}
+
+    def sheet(self, user_id):
+        return self._sheets.get(user_id)
+
+
+def timed(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        times.append(time.perf_counter() - t0)
+    return {"min": min(times), "median": statistics.median(times), "max": max(times), "repeat": repeat}
+
+
+# st.download_button 은 파일 객체 중 BufferedReader(open(..., "rb")) 는 받지만 TemporaryFile(BufferedRandom) 은 못 받음
+def check_downloads(result_df, weekly_df):
+    for fmt in EXPORT_FORMATS:
+        f = export_report(fmt, result_df, weekly_df)
+        try:
+            if not isinstance(f, io.BufferedReader):
+                raise TypeError(f"{fmt}: st.download_button 이 받을 수 없는 형식 {type(f)}")
+            data = f.read()
+        finally:
+            f.close()
+        if not data:
+            raise ValueError(f"{fmt}: 빈 파일")
+    print(f"(내보내기 {', '.join(EXPORT_FORMATS)} 다운로드 확인)")
+
+
+# 날짜만 미리 채워 둔 시트: 빈 날짜가 마지막 저장일이 되면 이후 기록이 증분 반영에서 빠짐
+def check_prefilled_dates(path, days=40, filled=10):
+    sheet = lms_sheets.parse_sheet_csv(make_sheet_csv(0, days))
+    sheet.loc[filled + 1:, HOUR_COLS] = float("nan")     # 0행은 목표
+    lms_store.upsert_sheet("prefilled", sheet, path=path)
+    last = lms_store.last_stored_date("prefilled", path)
+    if last != sheet.loc[filled, "일시"]:
+        raise ValueError(f"마지막 저장일 {last} (기록이 있는 마지막 날 {sheet.loc[filled, '일시']})")
+
+    # 한참 뒤 날짜에 새 기록 -> 증분 반영으로 들어가야 함
+    sheet.loc[days, HOUR_COLS[0]] = 1.5
+    lms_store.upsert_sheet("prefilled", sheet, path=path)
+    stored = lms_store.load_rows(["prefilled"], path=path)
+    if stored[HOUR_COLS[0]].iloc[-1] != 1.5:
+        raise ValueError("미리 채운 날짜 뒤의 새 기록이 저장소에 반영되지 않음")
+    print("(미리 채운 날짜가 있는 시트 증분 반영 확인)")
+
+
+def run_cases(n_students, days, repeat, only=None, latency=0.0):
+    students = make_students(n_students)
+    index = BenchIndex(students)
+    end = (pd.Timestamp(SEMESTER_START) + pd.Timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    results = {}
+
+    def case(name, fn, setup=None, times=repeat):
+        if only and not any(key in name for key in only):
+            return
+        results[name] = timed(fn, times, setup)
+        r = results[name]
+        print(f"{name:<28} median {r['median'] * 1000:10.2f} ms   min {r['min'] * 1000:10.2f} ms", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp, GvizServer(days, latency=latency) as server:
+        lms_sheets.GVIZ_CSV_URL = server.url_template
+        lms_store.STORE_PATH = os.path.join(tmp, "bench_store.sqlite3")
+
+        # --- 시트 한 개: 헤더 정리 / CSV 파싱 ---
+        raw_sheet = make_sheet(1, days)
+        header = list(raw_sheet.columns)
+        case("normalize_columns", lms_sheets.normalize_columns, setup=raw_sheet.copy)
+        case("build_schema", lambda: lms_sheets.build_schema(header))
+        case("resolve_schema (캐시)", lambda: lms_sheets.schema_registry.resolve(header))
+        case("load_sheet_csv", lambda: lms_sheets.load_sheet_csv(students[0]["sheet_id"]))
+
+        # --- 전체 학생: 다운로드 + 저장소 반영 (캐시 없이) ---
+        def sync():
+            return sync_students(students, index=index, refresh=True)
+
+        case("sync_students", sync, times=max(1, repeat // 3))
+        stored_ids, failed = sync()
+        if failed:
+            print(f"실패 {len(failed)}건: {failed[:3]}", file=sys.stderr)
+
+        # --- 주차 매핑 / 관리자 집계 ---
+        df_rows = lms_store.load_rows(stored_ids, SEMESTER_START, end)
+        case("add_week_columns", add_week_columns, setup=df_rows.copy)
+        case("build_report", lambda: build_report(students, stored_ids, SEMESTER_START, end))
+
+        # --- 반별 비교 (저장소 주간 롤업 -> 반 × 주차 × 그룹) ---
+        case("cohort_cube", lambda: cohort_cube(lms_store.load_weekly_rollup(), students))
+
+        # --- 순위 이력 (주차별 순위 표 -> 변화량) ---
+        weekly = weekly_stats(build_panel(df_rows, stored_ids))
+        weekly["익명"] = weekly["학생ID"].astype(str)
+        weeks = WEEK_TABLE[WEEK_TABLE["주차번호"].isin(weekly["주차번호"])].reset_index(drop=True)
+        frames = [weekly[weekly["주차번호"] == n] for n in weeks["주차번호"]]
+        case("build_rank_history", lambda: build_rank_history(weeks, frames))
+
+        # --- 학생 한 명의 차트 (캐시 없이 매번 새로 그림) ---
+        df_student = student_frame(df_rows[df_rows["학생ID"] == stored_ids[0]])
+        goals = goal_record(lms_store.load_goals(stored_ids[:1]).iloc[0])
+        case("stacked_bar_figure", lambda: stacked_bar_figure(df_student, ALL_VARS))
+        case("goal_actual_figure", lambda: goal_actual_figure(goals, df_student, ALL_VARS))
+        case("rolling_trends", lambda: rolling_trends(df_student))
+
+        # --- 관리자 내보내기 (요약 + 주차별 시트) ---
+        result_df, _, weekly_df, *_ = build_report(students, stored_ids, SEMESTER_START, end)
+        case("export_xlsx", lambda: export_report("XLSX", result_df, weekly_df).close())
+        check_downloads(result_df, weekly_df)
+
+        check_prefilled_dates(os.path.join(tmp, "prefilled.sqlite3"))
+
+        print(f"(gviz 요청 {server.requests}회)")
+
+        # --- 메모리: 저장소 행 그대로 vs 세션용 학생 표 vs 관리자 패널 ---
+        frames = [student_frame(part) for _, part in df_rows.groupby("학생ID", sort=False)]
+        print(memory_report({
+            "저장소 행 (load_rows)": [df_rows],
+            "학생 세션 표": frames,
+            "관리자 패널": [build_panel(df_rows, stored_ids)],
+        }).to_string(index=False))
+    return results
+
+
+def print_compare(results, baseline):
+    print("\n이전 결과 대비 (median, >1 이면 느려짐)")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = r["median"] / base["median"] if base["median"] else float("nan")
+        flag = "  ⚠️" if ratio > 1.2 else ""
+        print(f"{name:<28} x{ratio:6.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터로 주요 처리 단계 시간 측정")
+    parser.add_argument("--students", type=int, default=100, help="학생 수 (기본 100)")
+    parser.add_argument("--days", type=int, default=90, help="학생당 기록 일수 (기본 90)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (기본 5)")
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 서버 응답 지연(초)")
+    parser.add_argument("--only", action="append", help="이름에 이 문자열이 들어간 항목만 (여러 번 가능)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--compare", help="이전 --json 결과와 비교")
+    args = parser.parse_args(argv)
+
+    print(f"학생 {args.students}명 × {args.days}일, 반복 {args.repeat}회")
+    results = run_cases(args.students, args.days, args.repeat, only=args.only, latency=args.latency)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_compare(results, json.load(f)["results"])
+    if args.json:
+        meta = {"students": args.students, "days": args.days, "repeat": args.repeat}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from lms_config import DISPLAY_COLS, SEMESTER_START
+
+# ================== 벤치마크용 가짜 학생 시트 ==================
+# 실제 구글 시트처럼: 첫 행은 목표, 그 아래 날짜별 기록, 헤더에는 줄바꿈/공백이 섞여 있음
+GOAL_DATE = "2026. 02. 28"
+
+
+def messy_header(col, i):
+    if i % 3 == 0:
+        return col.replace("(", " \n(")
+    if i % 3 == 1:
+        return f" {col} "
+    return col
+
+
+def student_id(i):
+    return f"{30000 + i}"
+
+
+def sheet_id(i):
+    return f"bench-sheet-{i:05d}"
+
+
+# 학생 한 명의 시트 (DataFrame, 헤더 정리 전)
+def make_sheet(seed, days, start=SEMESTER_START, blank_rate=0.05):
+    rng = np.random.default_rng(seed)
+    n = len(DISPLAY_COLS) - 1
+    goal = np.round(rng.uniform(0.5, 3, n), 1)
+    values = np.round(rng.uniform(0, 3, (days, n)), 2)
+    # 빈 칸(기록 안 한 시간) 섞기
+    values[rng.random((days, n)) < blank_rate] = np.nan
+
+    dates = pd.date_range(start, periods=days).strftime("%Y. %m. %d")
+    df = pd.DataFrame(np.vstack([goal, values]), columns=DISPLAY_COLS[1:])
+    df.insert(0, "일시", [GOAL_DATE] + dates.tolist())
+    df.columns = [messy_header(c, i) for i, c in enumerate(df.columns)]
+    return df
+
+
+def make_sheet_csv(seed, days, start=SEMESTER_START):
+    return make_sheet(seed, days, start).to_csv(index=False).encode("utf-8")
+
+
+# 벤치마크용 계정 목록 (accounts.csv 행과 같은 dict)
+def make_students(n):
+    return [
+        {"id": student_id(i), "name": f"w{i % 4 + 1}_{i:03d}", "real": f"학생{i}",
+         "role": "student", "sheet_id": sheet_id(i)}
+        for i in range(n)
+    ]
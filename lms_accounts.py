@@ -0,0 +1,64 @@
+import os
+import threading
+
+import pandas as pd
+
+from lms_config import ACCOUNTS_FILE, SHEETS_FILE
+from lms_sheets import extract_sheet_id
+
+# ================== 계정 / 시트 연결 인덱스 ==================
+# accounts.csv, sheets.csv 를 한 번만 읽어 id -> 행(dict) 으로 보관
+# 파일 수정 시각(mtime)이 바뀌었을 때만 다시 읽음
+class AccountIndex:
+    def __init__(self, accounts_file=ACCOUNTS_FILE, sheets_file=SHEETS_FILE):
+        self.accounts_file = accounts_file
+        self.sheets_file = sheets_file
+        self._accounts = {}
+        self._sheets = {}
+        self._mtimes = (None, None)
+        self._lock = threading.Lock()
+
+    def _current_mtimes(self):
+        return (
+            os.stat(self.accounts_file).st_mtime_ns,
+            os.stat(self.sheets_file).st_mtime_ns if os.path.exists(self.sheets_file) else None,
+        )
+
+    def _read(self, path):
+        df = pd.read_csv(path, dtype=str)
+        df["id"] = df["id"].str.strip()
+        df = df.dropna(subset=["id"])
+        return {row["id"]: row for row in df.to_dict("records")}
+
+    def _refresh(self):
+        mtimes = self._current_mtimes()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            accounts = self._read(self.accounts_file)
+            sheets = self._read(self.sheets_file) if mtimes[1] is not None else {}
+            for row in sheets.values():
+                row["sheet_id"] = extract_sheet_id(row.get("sheet_url"))
+            self._accounts, self._sheets = accounts, sheets
+            self._mtimes = mtimes
+
+    def account(self, user_id):
+        self._refresh()
+        return self._accounts.get(str(user_id).strip())
+
+    def sheet(self, user_id):
+        self._refresh()
+        return self._sheets.get(str(user_id).strip())
+
+    def students(self):
+        self._refresh()
+        return [acc for acc in self._accounts.values() if acc.get("role") == "student"]
+
+    def sheet_ids(self):
+        self._refresh()
+        return list(self._sheets.keys())
+
+
+account_index = AccountIndex()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from lms_config import SEMESTER_START, SEMESTER_END
+
+# ================== 주차 달력 ==================
+# 학기 시작일부터 7일 단위로 주차를 만들고, 마지막 주는 학기 종료일에서 자름
+def make_week_table(start=SEMESTER_START, end=SEMESTER_END):
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    starts = pd.date_range(start, end, freq="7D")
+    ends = (starts + pd.Timedelta(days=6)).where(starts + pd.Timedelta(days=6) <= end, end)
+    week_nums = np.arange(1, len(starts) + 1)
+    labels = [
+        f"{n}주차 ({s.month}/{s.day}~{e.month}/{e.day})"
+        for n, s, e in zip(week_nums, starts, ends)
+    ]
+    return pd.DataFrame({
+        "주차번호": week_nums,
+        "주차": labels,
+        "start": starts,
+        "end": ends,
+    })
+
+
+# {주차 라벨: (시작일, 종료일)} 형식 (선택 상자용)
+def week_periods(weeks):
+    return {
+        label: (s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d"))
+        for label, s, e in zip(weeks["주차"], weeks["start"], weeks["end"])
+    }
+
+
+WEEK_TABLE = make_week_table()
+PRESET_PERIODS = week_periods(WEEK_TABLE)
+WEEK_NUMBERS = dict(zip(WEEK_TABLE["주차"], WEEK_TABLE["주차번호"]))
+
+
+# 날짜 배열 -> 주차 위치(0부터, 범위 밖은 -1)
+def week_positions(dates, weeks=WEEK_TABLE):
+    d = pd.to_datetime(pd.Series(dates)).to_numpy("datetime64[ns]")
+    starts = weeks["start"].to_numpy("datetime64[ns]")
+    ends = (weeks["end"] + pd.Timedelta(days=1)).to_numpy("datetime64[ns]")
+
+    pos = np.searchsorted(starts, d, side="right") - 1
+    safe = pos.clip(0, len(starts) - 1)
+    valid = (pos >= 0) & (d >= starts[safe]) & (d < ends[safe])
+    return np.where(valid, pos, -1)
+
+
+# df 에 주차번호, 주차 컬럼 추가 (범위 밖 날짜는 NaN)
+# 주차 이름은 범주형 (행마다 문자열을 두지 않음)
+def add_week_columns(df, date_col="일시", weeks=WEEK_TABLE):
+    pos = week_positions(df[date_col], weeks)
+    valid = pos >= 0
+    nums = weeks["주차번호"].to_numpy(dtype="float64")
+    return df.assign(
+        주차번호=np.where(valid, nums[pos], np.nan),
+        주차=pd.Categorical.from_codes(pos, categories=weeks["주차"]),
+    )
@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from lms_frames import as_float64
+from lms_sheets import TTLCache
+from lms_stats import ROLLING_WINDOWS
+from lms_timing import span
+
+# ================== 차트 ==================
+# 같은 입력(학생, 시트 버전, 기간, 변수)의 그림은 모든 세션이 재사용
+figure_cache = TTLCache(ttl=3600, max_entries=512)
+
+
+# key 가 None 이면 캐시하지 않음
+def _memoized(key, build):
+    if key is None:
+        with span("figure"):
+            return build()
+    fig = figure_cache.get(key)
+    if fig is None:
+        with span("figure", key=key[0]):
+            fig = build()
+        figure_cache.put(key, fig)
+    return fig
+
+
+# ------------------ 누적 막대 그래프 ------------------
+def _build_stacked_bar(df_range, selected_vars):
+    fig = go.Figure()
+    dates = df_range.index.strftime("%Y-%m-%d")
+    for var in selected_vars:
+        values = as_float64(pd.to_numeric(df_range[var], errors='coerce')).fillna(0)
+        fig.add_trace(go.Bar(
+            y=dates,
+            x=values,
+            orientation='h',
+            name=var,
+            text=values.round(2),
+            texttemplate='%{text}',
+            textposition='inside',
+            hovertemplate='(%{y}) %{x:.2f}시간<extra></extra>'
+        ))
+    fig.update_layout(
+        barmode='stack',
+        xaxis_title="시간(시간)",
+        yaxis_title="날짜",
+        yaxis={'autorange':'reversed'},
+        height=600,
+        template="plotly_white",
+        legend_traceorder='normal',
+        colorway=px.colors.qualitative.Pastel
+    )
+    fig.update_traces(textfont_size=14)
+    return fig
+
+
+# df_range: 일시 인덱스 표 (lms_frames.student_frame 을 자른 표)
+# cache_key: (학생ID, 시트 버전, 시작일, 종료일) 등 df_range 를 결정하는 값
+def stacked_bar_figure(df_range, selected_vars, cache_key=None):
+    key = None if cache_key is None else ("stacked_bar", cache_key, tuple(selected_vars))
+    return _memoized(key, lambda: _build_stacked_bar(df_range, selected_vars))
+
+
+# ------------------ 목표 대비 실천 주석 ------------------
+# 목표 / 실천 배열(변수별, 학생 × 변수 등 같은 모양)에서 달성률, 색, 글자를 한 번에 계산
+# 반복문 없이 NumPy 배열 연산으로 만들어 Plotly 에 그대로 넘김
+GOAL_NONE, GOAL_MISSED, GOAL_MET = 0, 1, 2          # 목표 없음(또는 0) / 미달 / 달성
+GOAL_COLORS = np.array(["#9e9e9e", "#e74c3c", "#2ecc71"])
+
+
+def _join(*parts):
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+# labels: 변수 이름 등 (goal / actual 과 같은 모양으로 broadcast)
+def goal_annotations(goal, actual, labels):
+    goal = np.asarray(goal, dtype="float64")
+    actual = np.asarray(actual, dtype="float64")
+    labels = np.asarray(labels, dtype=str)
+
+    has_actual = ~np.isnan(actual)
+    has_goal = ~np.isnan(goal)
+    has_target = has_goal & (goal != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(has_target & has_actual, actual / goal * 100, np.nan)
+    has_pct = ~np.isnan(pct)
+    status = np.where(
+        has_target, np.where(has_actual & (actual >= goal), GOAL_MET, GOAL_MISSED), GOAL_NONE
+    )
+
+    actual_hours = np.char.add(np.char.mod("%.2f", actual), "시간")
+    goal_hours = np.char.add(np.char.mod("%.2f", goal), "시간")
+    pct_sign = np.char.mod("%+.1f", pct)
+    return {
+        "actual_y": np.where(has_actual, actual, 0.0),
+        "goal_y": np.where(has_goal, goal, 0.0),
+        "pct": pct,
+        "pct_text": np.where(has_pct, np.char.mod("%.1f%%", pct), ""),
+        "status": status,
+        "colors": GOAL_COLORS[status],
+        # 실천 막대 위: "1.50시간 (+20.0%)"
+        "actual_text": np.where(
+            has_actual, _join(actual_hours, np.where(has_pct, _join(" (", pct_sign, "%)"), "")), ""
+        ),
+        "actual_hover": _join(
+            "(", labels, ") 실천: ", np.where(has_actual, actual_hours, "-"),
+            np.where(has_pct, _join("<br>목표 대비: ", pct_sign, "%"), ""),
+        ),
+        "goal_text": np.where(has_goal, goal_hours, ""),
+        "goal_hover": _join("(", labels, ") 목표: ", np.where(has_goal, goal_hours, "-")),
+    }
+
+
+# ------------------ 목표 대비 실천 그래프 ------------------
+def _build_goal_actual(labels, goal_num, avg_num):
+    ann = goal_annotations(goal_num, avg_num, labels)
+
+    fig = go.Figure()
+
+    # 평균값 Bar (개별 색/텍스트/hover 적용)
+    fig.add_trace(go.Bar(
+        x=labels,
+        y=ann["actual_y"],
+        name="실천",
+        marker_color=ann["colors"],
+        text=ann["actual_text"],
+        texttemplate='%{text}',
+        textposition='outside',
+        hovertext=ann["actual_hover"],
+        hovertemplate='%{hovertext}<extra></extra>'
+    ))
+
+    # 목표값 Bar
+    fig.add_trace(go.Bar(
+        x=labels,
+        y=ann["goal_y"],
+        name="목표",
+        marker_color='orange',
+        text=ann["goal_text"],
+        texttemplate='%{text}',
+        textposition='outside',
+        hovertext=ann["goal_hover"],
+        hovertemplate='%{hovertext}<extra></extra>'
+    ))
+
+    # 레이아웃 유지 + 약간의 margin 조정
+    fig.update_layout(
+        yaxis_title="시간(시간)",
+        xaxis_title="항목",
+        xaxis=dict(tickangle=-45),
+        height=600,
+        barmode='group',
+        template="plotly_white",
+        colorway=px.colors.qualitative.Pastel,
+        margin=dict(l=30, r=30, t=50, b=150)
+    )
+    fig.update_traces(textfont_size=14)
+    return fig
+
+
+# goals: 목표 레코드 (lms_stats.goal_record, 이미 float64), df_range: 기간 데이터 (lms_frames.student_frame 을 자른 표)
+def goal_actual_figure(goals, df_range, selected_vars, cache_key=None):
+    def build():
+        goal_num = goals.reindex(selected_vars)  # 목표가 없으면 NaN
+        avg_num = as_float64(df_range[selected_vars].apply(pd.to_numeric, errors='coerce').mean())
+        return _build_goal_actual(selected_vars, goal_num, avg_num)
+
+    key = None if cache_key is None else ("goal_actual", cache_key, tuple(selected_vars))
+    return _memoized(key, build)
+
+
+# ------------------ 이동 평균 / 연속 달성 그래프 ------------------
+# 기간 길이와 상관없이 trace 4개: 일별 막대, 7일 · 28일 평균 선, 연속 달성일 막대
+def _build_rolling_trend(trends, metric, target):
+    dates = trends.index.strftime("%Y-%m-%d")
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.06
+    )
+    fig.add_trace(go.Bar(
+        x=dates, y=trends[metric], name="일별", marker_color="#c7d7f5",
+        hovertemplate='(%{x}) %{y:.2f}시간<extra>일별</extra>'
+    ), row=1, col=1)
+    for window, color in zip(ROLLING_WINDOWS, ["#4a8af4", "#e67e22"]):
+        fig.add_trace(go.Scatter(
+            x=dates, y=trends[f"{metric} {window}일 평균"], name=f"{window}일 평균", mode="lines",
+            line=dict(color=color, width=2),
+            hovertemplate=f'(%{{x}}) %{{y:.2f}}시간<extra>{window}일 평균</extra>'
+        ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=dates, y=trends[f"{metric} 연속 달성"], name="연속 달성일", marker_color="#2ecc71",
+        hovertemplate='(%{x}) %{y}일 연속<extra></extra>'
+    ), row=2, col=1)
+    fig.add_hline(
+        y=target, line_dash="dash", line_color="#e74c3c", row=1, col=1,
+        annotation_text=f"하루 기준 {target:.1f}시간", annotation_position="top left"
+    )
+    fig.update_layout(
+        height=600,
+        template="plotly_white",
+        bargap=0.1,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+        margin=dict(l=40, r=40, t=60, b=60)
+    )
+    fig.update_yaxes(title_text="시간(시간)", row=1, col=1)
+    fig.update_yaxes(title_text="연속(일)", row=2, col=1)
+    return fig
+
+
+# trends: lms_stats.rolling_trends 결과를 기간으로 자른 표, metric: "공부총합" / "수면합"
+def rolling_trend_figure(trends, metric, target, cache_key=None):
+    key = None if cache_key is None else ("rolling_trend", cache_key, metric)
+    return _memoized(key, lambda: _build_rolling_trend(trends, metric, target))
+
+
+# ------------------ 전체 학생 목표 달성 지도 ------------------
+# 학생 × 변수 칸 하나에 달성 여부 색과 달성률 (trace 1개, 학생 / 변수 수와 상관없음)
+# students: 행 이름, actual / goal: 학생 × 변수 배열
+def _build_goal_attainment(students, variables, actual, goal):
+    ann = goal_annotations(goal, actual, np.asarray(variables)[None, :])
+    hover = _join(np.asarray(students, dtype=str)[:, None], "<br>", ann["actual_hover"], "<br>", ann["goal_hover"])
+    n_colors = len(GOAL_COLORS)
+    colorscale = [
+        [pos, color]
+        for i, color in enumerate(GOAL_COLORS)
+        for pos in (i / n_colors, (i + 1) / n_colors)
+    ]
+    fig = go.Figure(go.Heatmap(
+        z=ann["status"],
+        x=list(variables),
+        y=list(students),
+        text=ann["pct_text"],
+        texttemplate="%{text}",
+        hovertext=hover,
+        hovertemplate="%{hovertext}<extra></extra>",
+        colorscale=colorscale,
+        zmin=-0.5,
+        zmax=n_colors - 0.5,
+        showscale=False,
+        xgap=1,
+        ygap=1,
+    ))
+    fig.update_layout(
+        height=max(400, 28 * len(students) + 200),
+        template="plotly_white",
+        xaxis=dict(side="top", tickangle=-45),
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=40, r=20, t=140, b=20)
+    )
+    return fig
+
+
+def goal_attainment_figure(students, variables, actual, goal):
+    return _memoized(None, lambda: _build_goal_attainment(students, variables, actual, goal))
+
@@ -0,0 +1,42 @@
+# ================== 공통 설정 ==================
+ACCOUNTS_FILE = "accounts.csv"
+SHEETS_FILE = "sheets.csv"
+
+# ---------- 기준값 ----------
+MIN_STUDY_HOURS = 45.5    # 주당 최소 공부 시간 (6.5h * 7)
+MIN_SLEEP_HOURS = 45.5    # 주당 최소 수면 시간 (6.5h * 7)
+
+
+# 변수 정의
+GROUPS = {
+    "수면": ["낮잠(시간)", "밤잠(시간)"],
+    "종합": ["국어합(시간)", "수학합(시간)", "영어합(시간)", "탐구합(시간)"],
+    "국어": ["문학(시간)", "비문학(시간)", "화언(시간)", "국어기타(시간)"],
+    "수학": ["대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)"],
+    "영어": ["어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)"],
+    "탐구": ["통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)"]
+}
+
+# GROUPS 전체 변수 (중복 제거)
+ALL_VARS = []
+for vars_ in GROUPS.values():
+    for v in vars_:
+        if v not in ALL_VARS:
+            ALL_VARS.append(v)
+
+# 합산 대상
+SUM_VARS = ["국어합(시간)", "수학합(시간)", "영어합(시간)", "탐구합(시간)"]
+
+# 시트 표시/저장 컬럼 (일시 + 시간 컬럼)
+DISPLAY_COLS = [
+    "일시", "낮잠(시간)", "밤잠(시간)", "수면(시간)", "문학(시간)", "비문학(시간)",
+    "화언(시간)", "국어기타(시간)", "국어합(시간)",
+    "대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)", "수학합(시간)",
+    "어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)", "영어합(시간)",
+    "통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)", "탐구합(시간)", "전체합(시간)"
+]
+HOUR_COLS = DISPLAY_COLS[1:]
+
+# 학기 (주간 리포트용 주차 달력 생성 기준, lms_calendar 참고)
+SEMESTER_START = "2026-03-01"
+SEMESTER_END = "2026-12-31"
@@ -0,0 +1,122 @@
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from lms_timing import span
+
+# ================== 통계 내보내기 (XLSX / CSV / Parquet) ==================
+# XLSX 는 xlsxwriter constant_memory 모드로 한 행씩 씀 (행이 늘어도 메모리 일정)
+EXPORT_FORMATS = {
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+SUMMARY_SHEET_NAME = "요약"
+MATRIX_SHEET_NAME = "학생x주차"
+ATTAINMENT_SHEET_NAME = "목표달성률"
+CSV_CHUNK_ROWS = 10000
+
+
+# 엑셀 시트 이름 규칙 (31자, []:*?/\ 불가)
+def excel_sheet_name(name):
+    for ch in "[]:*?/\\":
+        name = name.replace(ch, ".")
+    return name[:31]
+
+
+def _cell(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return str(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+# sheets: [(시트 이름, DataFrame), ...], target: 파일 경로 또는 쓰기 가능한 파일 객체
+def write_xlsx(target, sheets):
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+    try:
+        for name, df in sheets:
+            worksheet = workbook.add_worksheet(excel_sheet_name(name))
+            worksheet.write_row(0, 0, list(df.columns))
+            for r, row in enumerate(df.itertuples(index=False, name=None), start=1):
+                worksheet.write_row(r, 0, [_cell(v) for v in row])
+    finally:
+        workbook.close()
+
+
+# write(임시 경로) 로 같은 폴더의 임시 파일에 쓴 뒤 path 로 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)
+# mkstemp 는 0600 으로 만들어 다른 사용자(웹 서버 등)가 못 읽으므로 umask 기본 권한으로 직접 만듦
+def write_atomic(path, write):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# 요약 시트 + 주차별 시트
+def report_sheets(summary_df, weekly_df=None):
+    sheets = [(SUMMARY_SHEET_NAME, summary_df)]
+    if weekly_df is not None and not weekly_df.empty:
+        for (_, week), df_w in weekly_df.groupby(["주차번호", "주차"]):
+            sheets.append((week, df_w.drop(columns=["주차번호", "주차"])))
+    return sheets
+
+
+# CSV / Parquet 용 한 장짜리 표 (전체 기간 요약은 주차 = "전체")
+def report_long_table(summary_df, weekly_df=None):
+    summary = summary_df.assign(주차번호=0, 주차="전체")
+    if "요약" in summary.columns:
+        summary["요약"] = summary["요약"].astype(str)
+    if weekly_df is None or weekly_df.empty:
+        return summary
+    return pd.concat([summary, weekly_df], ignore_index=True)
+
+
+# sheets 를 fmt 형식으로 디스크 임시 파일에 쓰고 처음으로 되감은 파일 객체 반환 (닫히면 삭제됨)
+# XLSX 는 시트별로, CSV / Parquet 는 table (한 장짜리 표) 로 씀
+def _export(fmt, sheets, table):
+    ext = EXPORT_FORMATS[fmt][0]
+    with tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False) as f:
+        path = f.name
+    try:
+        with span("export", key=fmt):
+            if fmt == "XLSX":
+                write_xlsx(path, sheets)
+            elif fmt == "CSV":
+                # 엑셀에서 한글이 깨지지 않도록 BOM 포함 (utf-8-sig)
+                table().to_csv(path, index=False, encoding="utf-8-sig", chunksize=CSV_CHUNK_ROWS)
+            else:
+                table().to_parquet(path, index=False)
+        # st.download_button 은 BufferedReader(open(..., "rb")) 는 받지만 TemporaryFile(BufferedRandom) 은 못 받음
+        # 열어 둔 뒤 바로 지우면 파일은 닫힐 때 사라짐
+        return open(path, "rb")
+    finally:
+        os.remove(path)
+
+
+# 요약 + 주차별 통계
+def export_report(fmt, summary_df, weekly_df=None):
+    return _export(fmt, report_sheets(summary_df, weekly_df), lambda: report_long_table(summary_df, weekly_df))
+
+
+# 학생 × 변수 × 주차 행렬
+def export_matrix(fmt, matrix_df):
+    return _export(fmt, [(MATRIX_SHEET_NAME, matrix_df)], lambda: matrix_df)
+
+
+def export_attainment(fmt, attainment_df):
+    return _export(fmt, [(ATTAINMENT_SHEET_NAME, attainment_df)], lambda: attainment_df)
@@ -0,0 +1,67 @@
+import threading
+import weakref
+
+import pandas as pd
+
+from lms_config import HOUR_COLS
+
+# ================== 메모리에 들고 있는 기록 표 ==================
+# 학생 세션마다 페이지가 끝날 때까지 들고 있는 표는 작게 유지
+# - 일시는 정렬된 인덱스 (기간 선택은 .loc[시작:끝] 으로 잘라 씀, 복사 없음)
+# - 시간 컬럼은 float32 (시트 값은 소수 둘째 자리까지라 표시 / 집계에 충분)
+# - 집계 결과를 표나 파일로 내보낼 때만 float64 로 올려서 반올림
+FRAME_DTYPE = "float32"
+FRAME_DECIMALS = 4     # float64 로 올릴 때 이 자리에서 반올림해 float32 오차(2.35 -> 2.3499999)를 없앰
+
+
+# 저장소 행(load_rows) -> 학생 기록 표 (일시 인덱스, 시간 컬럼 float32, 학생ID 없음)
+def student_frame(df_rows):
+    df = df_rows[HOUR_COLS].astype(FRAME_DTYPE)
+    df.index = pd.DatetimeIndex(df_rows["일시"], name="일시")
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
+
+
+# float32 값(표 / Series) -> float64 (목표와 비교하거나 화면에 숫자를 그대로 보일 때)
+def as_float64(values):
+    return values.astype("float64").round(FRAME_DECIMALS)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+# 이 프로세스의 세션들이 들고 있는 학생 기록 표 (세션이 끝나 표가 사라지면 자동으로 빠짐)
+class FrameRegistry:
+    def __init__(self):
+        self._frames = weakref.WeakValueDictionary()   # id(df) -> df
+        self._lock = threading.Lock()
+
+    def track(self, df):
+        with self._lock:
+            self._frames[id(df)] = df
+        return df
+
+    def frames(self):
+        with self._lock:
+            return list(self._frames.values())
+
+
+live_frames = FrameRegistry()
+
+
+# {이름: [표, ...]} -> 표 개수 / 학생-일(행) 수 / 바이트 / 학생-일당 바이트
+def memory_report(groups):
+    rows = []
+    for name, frames in groups.items():
+        n_rows = sum(len(df) for df in frames)
+        n_bytes = sum(frame_bytes(df) for df in frames)
+        rows.append({
+            "표": name,
+            "개수": len(frames),
+            "학생-일": n_rows,
+            "KB": round(n_bytes / 1024, 1),
+            "학생-일당 바이트": round(n_bytes / n_rows, 1) if n_rows else None,
+        })
+    return pd.DataFrame(rows, columns=["표", "개수", "학생-일", "KB", "학생-일당 바이트"])
@@ -0,0 +1,134 @@
+import csv
+import os
+import threading
+
+import gspread
+import pandas as pd
+import requests
+
+from lms_http import configure_session, host_slot
+from lms_sheets import FETCH_TIMEOUT, apply_schema_types, schema_registry
+from lms_timing import span
+
+# ================== Google Sheets API 백엔드 (선택) ==================
+# LMS_SHEET_BACKEND=gspread : 서비스 계정으로 한 번만 인증하고 같은 클라이언트(연결 풀)를 계속 씀
+# LMS_SHEET_BACKEND=fake    : LMS_FAKE_SHEETS_DIR/<sheet_id>.csv 를 API 응답처럼 돌려줌 (오프라인 개발/테스트용)
+SERVICE_ACCOUNT_FILE = os.environ.get("LMS_SERVICE_ACCOUNT_FILE", "service_account.json")
+FAKE_SHEETS_DIR = os.environ.get("LMS_FAKE_SHEETS_DIR", os.path.join("data", "fake_sheets"))
+
+# 첫 번째 시트의 A~Y 열 (일시 + 시간 컬럼 24개)
+SHEET_RANGES = [os.environ.get("LMS_SHEET_RANGE", "A:Y")]
+READONLY_SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+SHEETS_API_HOST = "sheets.googleapis.com"
+
+# 숫자는 숫자 그대로, 날짜는 시트에 보이는 문자열("2026. 3. 1") 그대로
+VALUE_PARAMS = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+
+# API 값 목록(첫 행 = 헤더) -> 정규화된 DataFrame (CSV 경로와 같은 스키마 / 타입)
+def values_to_frame(values, sheet_id=None):
+    header = [str(v) for v in values[0]] if values else []
+    with span("normalize", key=sheet_id):
+        schema = schema_registry.resolve(header, sheet_id)
+    with span("parse", key=sheet_id):
+        # API 는 행 끝의 빈 칸을 잘라서 보내므로 헤더 길이에 맞춰 채움
+        width = len(schema.names)
+        rows = [list(row[:width]) + [None] * (width - len(row)) for row in values[1:]]
+        df = pd.DataFrame(rows, columns=schema.names)
+        return apply_schema_types(df, schema)
+
+
+class GSheetsBackend:
+    # client: values_batch_get(id, ranges, params) 가 있는 객체 (gspread HTTPClient 또는 FakeValuesClient)
+    def __init__(self, client, ranges=SHEET_RANGES):
+        self.client = client
+        self.ranges = list(ranges)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    # 스프레드시트 하나에 필요한 범위를 batchGet 한 번으로 가져옴
+    def fetch_values(self, sheet_id):
+        with self._lock:
+            self.calls += 1
+        try:
+            with host_slot(SHEETS_API_HOST):
+                resp = self.client.values_batch_get(sheet_id, self.ranges, params=dict(VALUE_PARAMS))
+        except gspread.exceptions.APIError as e:
+            # fetch_sheets 가 다른 백엔드와 같은 사유("HTTP 오류 N")로 보여 주도록
+            raise requests.HTTPError(str(e), response=e.response) from e
+        return [vr.get("values", []) for vr in resp.get("valueRanges", [])]
+
+    def load(self, sheet_id, timeout=FETCH_TIMEOUT):
+        with span("fetch", key=sheet_id):
+            value_ranges = self.fetch_values(sheet_id)
+        return values_to_frame(value_ranges[0] if value_ranges else [], sheet_id)
+
+
+# ---------------- 서비스 계정 클라이언트 ----------------
+def service_account_client(filename=SERVICE_ACCOUNT_FILE, timeout=FETCH_TIMEOUT):
+    client = gspread.service_account(filename=filename, scopes=READONLY_SCOPES)
+    client.http_client.set_timeout(timeout)
+    # 인증 세션에도 공용 재시도 / 연결 풀 / gzip 설정
+    configure_session(client.http_client.session)
+    return client.http_client
+
+
+# ---------------- 로컬 가짜 API ----------------
+def _column_index(letters):
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - ord("A") + 1)
+    return n - 1
+
+
+# "A:Y", "A1:Y", "Sheet1!A:Y" -> (시작 열, 끝 열) 0부터
+def _range_columns(a1_range):
+    cells = a1_range.split("!")[-1].split(":")
+    letters = ["".join(ch for ch in cell if ch.isalpha()) for cell in cells]
+    return _column_index(letters[0]), _column_index(letters[-1])
+
+
+class FakeValuesClient:
+    def __init__(self, folder=FAKE_SHEETS_DIR):
+        self.folder = folder
+
+    def values_batch_get(self, id, ranges, params=None):
+        path = os.path.join(self.folder, f"{id}.csv")
+        if not os.path.exists(path):
+            resp = requests.Response()
+            resp.status_code = 404
+            raise requests.HTTPError(f"가짜 시트 없음: {path}", response=resp)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+
+        value_ranges = []
+        for a1_range in ranges:
+            first, last = _range_columns(a1_range)
+            values = []
+            for row in rows:
+                row = row[first:last + 1]
+                # 실제 API 처럼 행 끝의 빈 칸은 잘라냄
+                while row and row[-1] == "":
+                    row.pop()
+                values.append(row)
+            value_ranges.append({"range": a1_range, "majorDimension": "ROWS", "values": values})
+        return {"spreadsheetId": id, "valueRanges": value_ranges}
+
+
+# 백엔드는 종류별로 한 번만 만들어 프로세스 전체가 공유
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name):
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name == "gspread":
+                backend = GSheetsBackend(service_account_client())
+            elif name == "fake":
+                backend = GSheetsBackend(FakeValuesClient())
+            else:
+                raise ValueError(f"알 수 없는 시트 백엔드: {name}")
+            _backends[name] = backend
+        return backend
@@ -0,0 +1,72 @@
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# ================== 공용 HTTP 연결 ==================
+# 모든 원격 요청(시트 CSV, Sheets API)은 이 세션을 거침
+# - 연결 재사용 (호스트마다 TCP/TLS 연결을 한 번 맺고 계속 씀)
+# - gzip 압축 응답
+# - 일시적인 오류(429, 5xx, 연결 끊김)는 지수 백오프로 몇 번 다시 시도
+# - 같은 호스트에 동시에 보내는 요청 수 제한
+HTTP_MAX_RETRIES = int(os.environ.get("LMS_HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF = float(os.environ.get("LMS_HTTP_BACKOFF", 0.5))          # 0.5, 1, 2 ... 초
+HTTP_BACKOFF_MAX = float(os.environ.get("LMS_HTTP_BACKOFF_MAX", 8))    # 한 번 기다리는 최대 시간(초)
+HTTP_MAX_PER_HOST = int(os.environ.get("LMS_HTTP_MAX_PER_HOST", 6))    # 호스트당 동시 요청 수
+HTTP_POOL_SIZE = 16
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def make_retry():
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        # 응답이 느린 경우(읽기 시간 초과)는 다시 시도하지 않음 ("시간 초과" 로 바로 보고)
+        read=False,
+        backoff_factor=HTTP_BACKOFF,
+        backoff_max=HTTP_BACKOFF_MAX,
+        backoff_jitter=0.2,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        # 다시 시도해도 안 되면 마지막 응답을 그대로 돌려줌 (raise_for_status 로 "HTTP 오류 N")
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+
+
+def make_adapter():
+    return HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=make_retry())
+
+
+# 이미 있는 세션(예: gspread 의 인증 세션)에도 같은 재시도 / 연결 풀 설정을 붙임
+def configure_session(session):
+    adapter = make_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+http_session = configure_session(requests.Session())
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+@contextmanager
+def host_slot(host):
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+    with slot:
+        yield
+
+
+def http_get(url, timeout, **kwargs):
+    with host_slot(urlsplit(url).netloc):
+        return http_session.get(url, timeout=timeout, **kwargs)
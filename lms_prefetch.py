@@ -0,0 +1,108 @@
+import datetime
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+
+from lms_accounts import account_index
+from lms_sheets import SHEET_CACHE_TTL, get_sheet, sheet_cache
+from lms_store import upsert_sheet
+
+# ================== 시트 미리 받아 두기 (백그라운드) ==================
+# sheets.csv 의 모든 시트를 주기적으로 다시 받아 시트 캐시와 저장소에 반영
+# 학생이 페이지를 열 때는 이미 받아 둔 캐시를 읽으므로 Google 응답을 기다리지 않음
+# 주기는 시트 캐시 TTL 보다 짧게 (캐시가 만료되기 전에 다시 채우도록)
+PREFETCH_INTERVAL = int(os.environ.get("LMS_PREFETCH_INTERVAL", int(SHEET_CACHE_TTL * 0.8)))   # 초, 0 이면 끔
+PREFETCH_RATE = float(os.environ.get("LMS_PREFETCH_RATE", 2))    # 초당 최대 시트 수
+
+
+class SheetPrefetcher:
+    def __init__(self, index=account_index, interval=PREFETCH_INTERVAL, rate=PREFETCH_RATE):
+        self.index = index
+        self.interval = interval
+        self.rate = rate
+        self.passes = 0
+        self._status = {}            # 학생ID -> {"학생ID", "마지막 시도", "마지막 성공", "결과"}
+        self._stored_versions = {}   # 학생ID -> 저장소에 반영한 시트 캐시 버전
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # 여러 번 불러도 스레드는 하나만
+    def start(self):
+        with self._lock:
+            if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="lms-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # 서버 여러 대가 동시에 켜져도 요청이 한꺼번에 몰리지 않도록 첫 회는 무작위로 늦춤
+        if self._stop.wait(random.uniform(0, min(self.interval, 30))):
+            return
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_once()
+            if self._stop.wait(max(self.interval - (time.monotonic() - started), 1.0)):
+                return
+
+    # 한 바퀴: 시트 사이 간격은 주기의 절반에 고르게 퍼지도록, 단 초당 rate 개를 넘지 않게
+    def run_once(self):
+        jobs = []
+        for student_id in self.index.sheet_ids():
+            sheet = self.index.sheet(student_id)
+            if sheet is not None and sheet["sheet_id"] is not None:
+                jobs.append((student_id, sheet["sheet_id"]))
+        if not jobs:
+            return
+
+        gap = max(1.0 / self.rate, self.interval * 0.5 / len(jobs))
+        for i, (student_id, sheet_id) in enumerate(jobs):
+            if i and self._stop.wait(gap):
+                return
+            self.refresh(student_id, sheet_id)
+        self.passes += 1
+
+    def refresh(self, student_id, sheet_id):
+        try:
+            df = get_sheet(sheet_id, refresh=True)
+            version = sheet_cache.version(sheet_id)
+            upsert_sheet(student_id, df)
+            result = "성공"
+        except Exception as e:
+            version = None
+            result = f"실패 ({type(e).__name__})"
+        now = datetime.datetime.now()
+        with self._lock:
+            status = self._status.setdefault(student_id, {"학생ID": student_id, "마지막 성공": None})
+            status["마지막 시도"] = now
+            status["결과"] = result
+            if version is not None:
+                status["마지막 성공"] = now
+                self._stored_versions[student_id] = version
+
+    # 마지막으로 성공한 갱신 시각 (없으면 None)
+    def last_refresh(self, student_id):
+        with self._lock:
+            status = self._status.get(student_id)
+        return None if status is None else status["마지막 성공"]
+
+    # 이 시트 캐시 버전을 이미 저장소에 반영했는지 (페이지에서 같은 upsert 를 건너뛰는 데 사용)
+    def stored_version(self, student_id):
+        with self._lock:
+            return self._stored_versions.get(student_id)
+
+    def status(self):
+        with self._lock:
+            rows = [dict(status) for status in self._status.values()]
+        columns = ["학생ID", "마지막 시도", "마지막 성공", "결과"]
+        return pd.DataFrame(rows, columns=columns).sort_values("마지막 시도", ascending=False)
+
+
+prefetcher = SheetPrefetcher()
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from lms_calendar import WEEK_TABLE
+from lms_export import write_atomic
+from lms_report import RANK_DIR, REPORT_SHEET_NAME, rank_file_name, write_xlsx_atomic
+
+# ================== 주간 순위 파일 (로컬 Parquet + 메모리 캐시) ==================
+# Tab 4 는 weekly_rank/rank*.parquet 만 읽고, xlsx 는 내려받기/보관용으로만 씀
+
+
+def rank_paths(start, end, rank_dir=RANK_DIR):
+    xlsx_path = os.path.join(rank_dir, rank_file_name(start, end))
+    return os.path.splitext(xlsx_path)[0] + ".parquet", xlsx_path
+
+
+def _write_parquet_atomic(df, path):
+    write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+
+
+# Parquet 저장용 정리 (요약 리스트는 xlsx 와 같은 문자열로)
+def _to_artifact(df):
+    df = df.copy()
+    df["학생ID"] = df["학생ID"].astype(str).str.strip()
+    if "요약" in df.columns:
+        df["요약"] = df["요약"].astype(str)
+    return df
+
+
+# 순위 파일 쓰기 (Parquet + xlsx)
+def write_rank_files(result_df, start, end, rank_dir=RANK_DIR):
+    parquet_path, xlsx_path = rank_paths(start, end, rank_dir)
+    os.makedirs(rank_dir, exist_ok=True)
+    df = _to_artifact(result_df)
+    _write_parquet_atomic(df, parquet_path)
+    write_xlsx_atomic(df, xlsx_path, sheet_name=REPORT_SHEET_NAME)
+    return parquet_path, xlsx_path
+
+
+class RankCache:
+    def __init__(self):
+        self._entries = {}      # parquet 경로 -> ((mtime_ns, 크기), sha1, DataFrame)
+        self._history = None    # (주차별 sha1 묶음, 순위 이력 DataFrame)
+        self._lock = threading.Lock()
+
+    # (sha1, DataFrame) 반환, 파일이 없으면 None
+    def _load_entry(self, start, end, rank_dir):
+        parquet_path, xlsx_path = rank_paths(start, end, rank_dir)
+
+        # 예전에 손으로 올린 xlsx 만 있는 주차는 한 번 Parquet 으로 변환
+        if not os.path.exists(parquet_path):
+            if not os.path.exists(xlsx_path):
+                return None
+            _write_parquet_atomic(_to_artifact(pd.read_excel(xlsx_path)), parquet_path)
+
+        # 수정 시각 / 크기가 그대로면 파일을 다시 읽지 않음
+        # (stat 을 읽기 전에 해 두므로 그 사이 파일이 바뀌면 다음 호출에서 다시 읽음)
+        st_info = os.stat(parquet_path)
+        stamp = (st_info.st_mtime_ns, st_info.st_size)
+        with self._lock:
+            entry = self._entries.get(parquet_path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1:]
+
+        with open(parquet_path, "rb") as f:
+            data = f.read()
+        checksum = hashlib.sha1(data).hexdigest()
+
+        # 내용이 같으면(같은 표를 다시 쓴 경우) 표는 그대로 두고 stamp 만 갱신
+        # 다르면 해시한 바로 그 바이트를 파싱해 체크섬과 표가 같은 버전이 되도록
+        if entry is not None and entry[1] == checksum:
+            df = entry[2]
+        else:
+            df = pd.read_parquet(io.BytesIO(data))
+        entry = (stamp, checksum, df)
+        with self._lock:
+            self._entries[parquet_path] = entry
+        return entry[1:]
+
+    def load(self, start, end, rank_dir=RANK_DIR):
+        entry = self._load_entry(start, end, rank_dir)
+        return None if entry is None else entry[1].copy()
+
+    # 순위 파일이 있는 모든 주차의 이력 (파일이 하나라도 바뀌면 다시 계산)
+    def history(self, rank_dir=RANK_DIR):
+        weeks = available_rank_weeks(rank_dir)
+        entries = [self._load_entry(s, e, rank_dir) for s, e in zip(weeks["start"], weeks["end"])]
+        key = (rank_dir, tuple(entry[0] for entry in entries))
+
+        with self._lock:
+            if self._history is not None and self._history[0] == key:
+                return self._history[1]
+
+        history = build_rank_history(weeks, [entry[1] for entry in entries])
+        with self._lock:
+            self._history = (key, history)
+        return history
+
+
+rank_cache = RankCache()
+
+
+# 순위 파일이 있는 주차 (주차 달력 순서)
+def available_rank_weeks(rank_dir=RANK_DIR):
+    exists = [
+        any(os.path.exists(p) for p in rank_paths(s, e, rank_dir))
+        for s, e in zip(WEEK_TABLE["start"], WEEK_TABLE["end"])
+    ]
+    return WEEK_TABLE[exists].reset_index(drop=True)
+
+
+# 학생 × 주차 순위 이력 (공부총합, 순위, 직전 주차 대비 변화)
+# weeks: 순위 파일이 있는 주차(달력 순서), frames: 같은 순서의 순위 표
+def build_rank_history(weeks, frames):
+    columns = ["학생ID", "익명", "주차번호", "주차", "공부총합", "순위",
+               "이전공부총합", "이전순위", "공부총합변화", "순위변화", "변화"]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    history = pd.concat(
+        [
+            df[["학생ID", "익명", "공부총합", "순위"]].assign(
+                주차순서=i, 주차번호=week_num, 주차=label
+            )
+            for i, (df, week_num, label) in enumerate(zip(frames, weeks["주차번호"], weeks["주차"]))
+        ],
+        ignore_index=True,
+    )
+    history["학생ID"] = history["학생ID"].astype(str).str.strip()
+
+    # 바로 앞 순위 파일의 같은 학생 행을 붙임 (없으면 NaN)
+    prev = history[["학생ID", "주차순서", "공부총합", "순위"]].rename(
+        columns={"공부총합": "이전공부총합", "순위": "이전순위"}
+    )
+    prev["주차순서"] += 1
+    history = history.merge(prev, on=["학생ID", "주차순서"], how="left")
+
+    history["공부총합변화"] = (history["공부총합"] - history["이전공부총합"]).round(2)
+    history["순위변화"] = history["이전순위"] - history["순위"]    # + 면 순위 상승
+    history["변화"] = np.select(
+        [history["공부총합변화"] > 0, history["공부총합변화"] < 0], ["▲", "▼"], default="—"
+    )
+    return history.sort_values(["주차번호", "순위", "익명"])[columns].reset_index(drop=True)
+
+
+# 순위변화 숫자 -> "▲2" / "▼1" / "—"
+def format_rank_delta(delta):
+    steps = delta.abs().fillna(0).astype(int).astype(str)
+    return pd.Series(
+        np.select([delta > 0, delta < 0], ["▲" + steps, "▼" + steps], default="—"),
+        index=delta.index,
+    )
@@ -0,0 +1,115 @@
+import os
+
+import pandas as pd
+
+from lms_accounts import account_index
+from lms_config import GROUPS
+from lms_export import write_atomic, write_xlsx
+from lms_sheets import FETCH_MAX_WORKERS, TTLCache, fetch_sheets
+from lms_stats import (
+    attach_accounts, build_panel, goal_attainment, goal_frame, goal_record, group_stats,
+    make_student_weekly_summary, student_stats, weekly_matrix, weekly_stats
+)
+from lms_store import load_goals, load_rows, upsert_sheet
+from lms_timing import span
+
+# ================== 전체 학생 주간 통계 (관리자 화면 / 순위 파일 공용) ==================
+RANK_DIR = "weekly_rank"
+REPORT_SHEET_NAME = "전체학생_주간통계"
+
+# (학생ID, 시트 버전) -> 목표 레코드: 시트가 바뀌지 않으면 저장소를 다시 읽거나 변환하지 않음
+goal_cache = TTLCache(ttl=3600)
+
+
+def student_goals(student_id, version=None):
+    key = (student_id, version)
+    goals = goal_cache.get(key)
+    if goals is None:
+        goals = goal_record(load_goals([student_id]).reindex([student_id]).iloc[0])
+        goal_cache.put(key, goals)
+    return goals
+
+
+# 학생 시트를 병렬로 받아 저장소에 반영
+# 반환값: (저장된 학생ID 목록, 실패 목록 [{학생ID, 익명, 사유}])
+def sync_students(students, index=account_index, refresh=False,
+                  max_workers=FETCH_MAX_WORKERS, on_progress=None):
+    failed_rows = []
+    sheet_jobs = {}
+    for acc in students:
+        user_id = acc["id"]
+        sheet = index.sheet(user_id)
+        if sheet is None:
+            failed_rows.append({"학생ID": user_id, "익명": acc["name"], "사유": "시트 미연결"})
+            continue
+        if sheet["sheet_id"] is None:
+            failed_rows.append({"학생ID": user_id, "익명": acc["name"], "사유": "시트 URL 형식 오류"})
+            continue
+        sheet_jobs[user_id] = sheet["sheet_id"]
+
+    fetched, fetch_failures = fetch_sheets(
+        sheet_jobs, max_workers=max_workers, on_progress=on_progress, refresh=refresh
+    )
+
+    # 받은 시트를 로컬 저장소에 반영 (최근 행만)
+    stored_ids = []
+    for acc in students:
+        user_id = acc["id"]
+        if user_id in fetch_failures:
+            failed_rows.append({"학생ID": user_id, "익명": acc["name"], "사유": fetch_failures[user_id]})
+            continue
+        if user_id not in fetched:
+            continue
+        try:
+            with span("store", key=user_id):
+                upsert_sheet(user_id, fetched[user_id])
+        except ValueError as e:
+            failed_rows.append({"학생ID": user_id, "익명": acc["name"], "사유": str(e)})
+            continue
+        stored_ids.append(user_id)
+
+    return stored_ids, failed_rows
+
+
+# 학생 × 목표 변수 float64 표 (목표가 없는 학생은 빈 행)
+def report_goals(stored_ids):
+    return goal_frame(load_goals(stored_ids).reindex(stored_ids))
+
+
+# 기간 [start, end] 의 학생별 평균 / 순위 / 요약
+# 반환값: (통계 표, 과목 그룹 표, 학생 × 주차 표, {학생ID: 요약}, 학생 × 변수 × 주차 행렬, 목표 달성률 표, 목표 표)
+# 목표 표는 달성률 계산에 쓴 것 그대로 (화면의 달성률 그림이 저장소를 다시 읽지 않도록)
+def build_report(students, stored_ids, start, end):
+    with span("load", key="report"):
+        df_rows = load_rows(stored_ids, start, end)
+        goals = report_goals(stored_ids)
+    with span("aggregate", key="report"):
+        return _aggregate_report(students, stored_ids, df_rows, goals)
+
+
+def _aggregate_report(students, stored_ids, df_rows, goals):
+    panel = build_panel(df_rows, stored_ids)
+
+    stats = student_stats(panel)
+    result_df = attach_accounts(stats, students)
+    attainment_df = attach_accounts(goal_attainment(stats, goals), students)
+    group_df = attach_accounts(group_stats(panel, GROUPS), students)
+    weekly_df = attach_accounts(weekly_stats(panel), students)
+    matrix_df = attach_accounts(weekly_matrix(panel), students)
+
+    # 학생별 자동 요약 (각 학생의 기록과 목표 기준)
+    summaries = {}
+    for student_id, df_s in panel.groupby("학생ID", observed=False):
+        summaries[student_id] = make_student_weekly_summary(df_s, goals.loc[student_id])
+    result_df["요약"] = result_df["학생ID"].map(summaries)
+
+    return result_df, group_df, weekly_df, summaries, matrix_df, attainment_df, goals
+
+
+def rank_file_name(start, end):
+    return f"rank{pd.Timestamp(start):%Y%m%d}_{pd.Timestamp(end):%Y%m%d}.xlsx"
+
+
+def write_xlsx_atomic(df, path, sheet_name=REPORT_SHEET_NAME):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_atomic(path, lambda tmp_path: write_xlsx(tmp_path, [(sheet_name, df)]))
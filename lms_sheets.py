@@ -0,0 +1,314 @@
+import contextvars
+import csv
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from lms_config import DISPLAY_COLS, HOUR_COLS
+from lms_http import http_get
+from lms_timing import span
+
+# ================== Google Sheet 불러오기 ==================
+GVIZ_CSV_URL = "https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
+SHEET_DATE_FORMAT = "%Y-%m-%d"     # parse_sheet_dates 에서 "2026. 03. 01" 을 바꾼 뒤의 형식
+
+# 시트를 읽는 방법: "gviz" (공개 CSV, 기본) / "gspread" (서비스 계정 API) / "fake" (로컬 CSV 폴더)
+SHEET_BACKEND = os.environ.get("LMS_SHEET_BACKEND", "gviz")
+
+FETCH_MAX_WORKERS = 8     # 동시에 내려받는 시트 수
+FETCH_TIMEOUT = 20        # 시트 1개당 제한 시간(초)
+
+# 시트 캐시 설정 (환경변수로 변경 가능)
+SHEET_CACHE_TTL = int(os.environ.get("LMS_SHEET_CACHE_TTL", 300))            # 초
+SHEET_CACHE_MAX_ENTRIES = int(os.environ.get("LMS_SHEET_CACHE_MAX_ENTRIES", 500))
+
+
+def extract_sheet_id(sheet_url):
+    if not isinstance(sheet_url, str) or "/d/" not in sheet_url:
+        return None
+    return sheet_url.split("/d/")[1].split("/")[0]
+
+
+def gviz_csv_url(sheet_id):
+    return GVIZ_CSV_URL.format(sheet_id=sheet_id)
+
+
+# 컬럼 이름 정규화 (공백, 줄바꿈, 전각 공백 제거)
+def clean_column_name(name):
+    name = str(name).strip()
+    for ch in ('\r', '\n', ' ', '　'):
+        name = name.replace(ch, '')
+    return name
+
+
+def clean_column_names(columns):
+    return [clean_column_name(c) for c in columns]
+
+
+def normalize_columns(df):
+    df.columns = clean_column_names(df.columns)
+    return df
+
+
+# 시트의 일시 칸 ("2026. 03. 01" / "2026. 3. 1") -> "2026-03-01" 로 바꿔 고정 형식으로 파싱
+# 형식이 다른 칸만 형식 추론으로 다시 시도
+def parse_sheet_dates(values):
+    values = values.astype("str")
+    iso = values.str.replace(". ", "-", regex=False).str.rstrip(".")
+    dates = pd.to_datetime(iso, format=SHEET_DATE_FORMAT, errors="coerce")
+    retry = dates.isna() & values.notna() & (values != "")
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry], format="mixed", errors="coerce")
+    return dates
+
+
+# 정규화한 뒤 같은 이름이 된 컬럼은 read_csv 처럼 ".1", ".2" 를 붙여 구분 (빈 이름은 "Unnamed: i")
+def _dedupe_names(names):
+    seen = {}
+    result = []
+    for i, name in enumerate(names):
+        if not name:
+            name = f"Unnamed: {i}"
+        n = seen.get(name, 0)
+        seen[name] = n + 1
+        result.append(name if n == 0 else f"{name}.{n}")
+    return result
+
+
+def _read_header(content):
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline=""))
+    return next(reader, [])
+
+
+# ================== 헤더 스키마 ==================
+# 원본 헤더 -> 정규화된 컬럼 이름 + 누락 / 알 수 없는 컬럼
+# 학생 시트는 대부분 같은 양식이라 헤더 모양(지문)별로 한 번만 계산해 두고 재사용
+SheetSchema = namedtuple("SheetSchema", ["fingerprint", "names", "hour_cols", "missing", "unknown"])
+
+
+def header_fingerprint(header):
+    return hashlib.sha1("\x1f".join(header).encode("utf-8")).hexdigest()[:12]
+
+
+def build_schema(header):
+    names = _dedupe_names(clean_column_names(header))
+    return SheetSchema(
+        fingerprint=header_fingerprint(header),
+        names=names,
+        hour_cols=[name for name in names if name in HOUR_COLS],
+        missing=[col for col in DISPLAY_COLS if col not in names],
+        unknown=[name for name in names if name not in DISPLAY_COLS and not name.startswith("Unnamed: ")],
+    )
+
+
+class SchemaRegistry:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._schemas = OrderedDict()   # 원본 헤더 튜플 -> SheetSchema
+        self._sheets = {}               # sheet_id -> 마지막으로 본 SheetSchema
+        self._lock = threading.Lock()
+
+    def resolve(self, header, sheet_id=None):
+        header = tuple(header)
+        with self._lock:
+            schema = self._schemas.get(header)
+            if schema is not None:
+                self._schemas.move_to_end(header)
+                self.hits += 1
+        if schema is None:
+            schema = build_schema(header)
+            with self._lock:
+                self.misses += 1
+                self._schemas[header] = schema
+                while len(self._schemas) > self.max_entries:
+                    self._schemas.popitem(last=False)
+        if sheet_id is not None:
+            with self._lock:
+                self._sheets[sheet_id] = schema
+        return schema
+
+    # 헤더 모양별 시트 수 / 누락 컬럼 / 알 수 없는 컬럼 (문제 있는 양식부터)
+    def report(self):
+        with self._lock:
+            sheets = dict(self._sheets)
+        rows = {}
+        for sheet_id, schema in sheets.items():
+            row = rows.setdefault(schema.fingerprint, {
+                "헤더 지문": schema.fingerprint,
+                "시트 수": 0,
+                "누락 컬럼": ", ".join(schema.missing),
+                "알 수 없는 컬럼": ", ".join(schema.unknown),
+                "예시 시트": sheet_id,
+            })
+            row["시트 수"] += 1
+        df = pd.DataFrame(list(rows.values()), columns=["헤더 지문", "시트 수", "누락 컬럼", "알 수 없는 컬럼", "예시 시트"])
+        problem = (df["누락 컬럼"] != "") | (df["알 수 없는 컬럼"] != "")
+        return df.assign(_p=problem).sort_values(["_p", "시트 수"], ascending=False).drop(columns="_p")
+
+
+schema_registry = SchemaRegistry()
+
+
+# CSV 본문 -> 정규화된 DataFrame (시간 컬럼 float64, 일시 datetime64)
+# C 엔진으로 읽고, C 엔진이 읽지 못하는 깨진 CSV 만 python 엔진으로 다시 읽음
+# (read_csv 에 dtype= 을 주면 pandas 3 에서는 추론보다 오히려 느려서 읽은 뒤에 맞춤)
+def parse_sheet_csv(content, sheet_id=None):
+    with span("normalize", key=sheet_id):
+        schema = schema_registry.resolve(_read_header(content), sheet_id)
+
+    with span("parse", key=sheet_id):
+        options = dict(header=0, names=schema.names, on_bad_lines="skip")
+        try:
+            df = pd.read_csv(io.BytesIO(content), engine="c", **options)
+        except (ValueError, pd.errors.ParserError):
+            df = pd.read_csv(io.BytesIO(content), engine="python", **options)
+
+        return apply_schema_types(df, schema)
+
+
+# 시간 컬럼은 float64 (숫자가 아닌 값이 섞인 컬럼만 변환), 일시는 datetime64
+def apply_schema_types(df, schema):
+    dtypes = df.dtypes
+    mistyped = [c for c in schema.hour_cols if dtypes[c] != "float64"]
+    if mistyped:
+        df[mistyped] = df[mistyped].apply(pd.to_numeric, errors="coerce").astype("float64")
+    if "일시" in df.columns:
+        df["일시"] = parse_sheet_dates(df["일시"])
+    return df
+
+
+def load_sheet_csv(sheet_id, timeout=FETCH_TIMEOUT):
+    with span("fetch", key=sheet_id):
+        resp = http_get(gviz_csv_url(sheet_id), timeout)
+        resp.raise_for_status()
+    return parse_sheet_csv(resp.content, sheet_id)
+
+
+# ================== 캐시 ==================
+# 프로세스 전체(모든 세션)가 공유하는 TTL + LRU 캐시 (시트, 차트 등에 사용)
+class TTLCache:
+    def __init__(self, ttl=SHEET_CACHE_TTL, max_entries=SHEET_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()    # 키 -> (저장 시각, 값, 버전)
+        self._next_version = 1
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, self._next_version)
+            self._next_version += 1
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # 캐시에 들어간 값의 버전 (새로 넣을 때마다 바뀜)
+    def version(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+
+    # 아직 만료되지 않은 값 목록 (메모리 보고용)
+    def values(self):
+        now = time.monotonic()
+        with self._lock:
+            return [value for saved, value, _ in self._entries.values() if now - saved < self.ttl]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+sheet_cache = TTLCache()
+
+
+# SHEET_BACKEND 에 맞는 방법으로 시트 한 개를 읽음
+def load_sheet(sheet_id, timeout=FETCH_TIMEOUT):
+    if SHEET_BACKEND == "gviz":
+        return load_sheet_csv(sheet_id, timeout)
+    # gspread / google-auth 는 이 백엔드를 쓸 때만 불러옴
+    from lms_gsheets import get_backend
+    return get_backend(SHEET_BACKEND).load(sheet_id, timeout)
+
+
+# 캐시를 거쳐 시트를 가져옴 (호출한 쪽에서 수정해도 캐시가 바뀌지 않도록 사본 반환)
+def get_sheet(sheet_id, timeout=FETCH_TIMEOUT, refresh=False):
+    df = None if refresh else sheet_cache.get(sheet_id)
+    if df is None:
+        df = load_sheet(sheet_id, timeout)
+        sheet_cache.put(sheet_id, df)
+    return df.copy()
+
+
+# 여러 시트를 동시에 내려받음
+# jobs: {key: sheet_id}, on_progress(done, total, key) 는 호출한 스레드에서 불림
+def fetch_sheets(jobs, max_workers=FETCH_MAX_WORKERS, timeout=FETCH_TIMEOUT, on_progress=None, refresh=False):
+    results = {}
+    failures = {}
+    total = len(jobs)
+    if total == 0:
+        return results, failures
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            # 작업 스레드에서도 같은 실행 번호로 시간 기록
+            pool.submit(contextvars.copy_context().run, get_sheet, sheet_id, timeout, refresh): key
+            for key, sheet_id in jobs.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except requests.Timeout:
+                failures[key] = f"시간 초과 ({timeout}초)"
+            except requests.HTTPError as e:
+                failures[key] = f"HTTP 오류 {e.response.status_code}"
+            except requests.ConnectionError:
+                failures[key] = "연결 실패"
+            except Exception as e:
+                failures[key] = f"{type(e).__name__}: {e}"
+            if on_progress is not None:
+                on_progress(done, total, key)
+
+    return results, failures
@@ -0,0 +1,235 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from lms_calendar import WEEK_TABLE, add_week_columns
+from lms_config import ALL_VARS, GROUPS, HOUR_COLS, MIN_SLEEP_HOURS, MIN_STUDY_HOURS, SUM_VARS
+from lms_frames import as_float64
+
+# ================== 학생 전체 패널 집계 ==================
+SLEEP_VARS = ["낮잠(시간)", "밤잠(시간)"]
+
+# 관리자 통계 컬럼 순서
+STAT_COLS = [
+    "낮잠(시간)", "밤잠(시간)", "수면합",
+    "문학(시간)", "비문학(시간)", "화언(시간)", "국어기타(시간)", "국어합(시간)",
+    "대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)", "수학합(시간)",
+    "어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)", "영어합(시간)",
+    "통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)", "탐구합(시간)", "공부총합"
+]
+
+
+# 저장소 행(학생ID, 일시, 시간 컬럼) -> 학생 × 날짜 패널 (주차 컬럼 포함)
+# 학생ID / 주차는 범주형, 시간 컬럼은 float64 그대로 (순위가 반올림 경계에서 바뀌지 않도록)
+# 중간 사본 없이 만들고 집계가 끝나면 버림
+def build_panel(df_rows, student_ids=None):
+    if student_ids is None:
+        student_ids = pd.unique(df_rows["학생ID"])
+    panel = df_rows[HOUR_COLS].astype("float64")
+    panel.insert(0, "일시", df_rows["일시"])
+    panel.insert(0, "학생ID", pd.Categorical(df_rows["학생ID"], categories=list(student_ids)))
+    return add_week_columns(panel)
+
+
+# 평균을 소수 둘째 자리로 반올림한 뒤 수면합 / 공부총합 (빈 값은 0 으로 합산)
+def _add_totals(means):
+    means = means.round(2)
+    means["수면합"] = means[SLEEP_VARS].sum(axis=1).round(2)
+    means["공부총합"] = means[SUM_VARS].sum(axis=1).round(2)
+    return means
+
+
+# 학생별 기간 평균 + 순위 (데이터가 없는 학생도 한 행씩)
+def student_stats(panel):
+    means = panel.groupby("학생ID", observed=False)[ALL_VARS].mean()
+    stats = _add_totals(means)
+    stats["순위"] = stats["공부총합"].rank(method="min", ascending=False).astype("int64")
+    return stats[STAT_COLS + ["순위"]].reset_index()
+
+
+# 학생 × 주차 평균 + 주차 내 순위
+def weekly_stats(panel):
+    weekly = panel.dropna(subset=["주차번호"])
+    means = weekly.groupby(["학생ID", "주차번호", "주차"], observed=True)[ALL_VARS].mean()
+    stats = _add_totals(means)
+    stats["순위"] = (
+        stats.groupby(level="주차번호")["공부총합"].rank(method="min", ascending=False).astype("int64")
+    )
+    return stats[STAT_COLS + ["순위"]].reset_index()
+
+
+# 학생 × 변수 × (평균 / 합계) 행, 주차 열 (groupby 한 번으로 주차별 평균과 합계를 함께 계산)
+def weekly_matrix(panel):
+    weekly = panel.dropna(subset=["주차번호"])
+    grouped = weekly.groupby(["학생ID", "주차번호"], observed=True)[ALL_VARS]
+    parts = {
+        "평균": _add_totals(grouped.mean()),
+        # 기록이 없는 주는 평균처럼 빈 칸 (sum 기본값은 0)
+        "합계": _add_totals(grouped.sum(min_count=1)),
+    }
+    long = pd.concat({name: part[STAT_COLS] for name, part in parts.items()}, names=["통계"])
+    long.columns.name = "변수"
+    matrix = long.stack().unstack("주차번호")
+
+    # 주차번호 -> 주차 이름, 행 순서는 학생 / STAT_COLS / 평균·합계
+    labels = dict(zip(weekly["주차번호"], weekly["주차"]))
+    matrix.columns = [labels[n] for n in matrix.columns]
+    students = [s for s in panel["학생ID"].cat.categories if s in matrix.index.get_level_values("학생ID")]
+    order = pd.MultiIndex.from_product([students, STAT_COLS, list(parts)], names=["학생ID", "변수", "통계"])
+    return matrix.reorder_levels(["학생ID", "변수", "통계"]).reindex(order).reset_index()
+
+
+# 학생 × 과목 그룹 평균 합계 (GROUPS 기준)
+def group_stats(panel, groups):
+    means = panel.groupby("학생ID", observed=False)[ALL_VARS].mean().round(2)
+    return pd.DataFrame(
+        {name: means[vars_].sum(axis=1, min_count=1) for name, vars_ in groups.items()},
+        index=means.index,
+    ).round(2).reset_index()
+
+
+# ================== 이동 평균 / 연속 달성 ==================
+# 하루 기준 = 주당 최소 시간 / 7
+DAILY_TARGETS = {"공부총합": MIN_STUDY_HOURS / 7, "수면합": MIN_SLEEP_HOURS / 7}
+ROLLING_WINDOWS = [7, 28]
+
+
+# 열마다 연속으로 True 인 일수 (False 에서 0 으로 돌아감)
+# 마지막으로 False 였던 위치를 누적 최댓값으로 구해 현재 위치에서 뺌
+def _streaks(met):
+    idx = np.arange(len(met))[:, None]
+    last_miss = np.maximum.accumulate(np.where(met, -1, idx), axis=0)
+    return idx - last_miss
+
+
+# 학생 기록 표(lms_frames.student_frame) -> 날짜별 공부총합 / 수면합, 7일 · 28일 이동 평균, 연속 달성일
+# 기록이 없는 날도 한 행씩 (이동 평균에서는 빠지고, 연속 달성은 끊김)
+def rolling_trends(df_student):
+    if df_student.empty:
+        return pd.DataFrame()
+    daily = pd.DataFrame({
+        "공부총합": df_student[SUM_VARS].sum(axis=1, min_count=1),
+        "수면합": df_student[SLEEP_VARS].sum(axis=1, min_count=1),
+    }).astype("float64")
+    daily = daily.groupby(level=0).sum(min_count=1).asfreq("D")
+
+    parts = [daily]
+    for window in ROLLING_WINDOWS:
+        parts.append(daily.rolling(window, min_periods=1).mean().add_suffix(f" {window}일 평균"))
+    met = daily.to_numpy() >= np.array([DAILY_TARGETS[c] for c in daily.columns])
+    parts.append(pd.DataFrame(_streaks(met), index=daily.index, columns=daily.columns).add_suffix(" 연속 달성"))
+    return pd.concat(parts, axis=1).round(2)
+
+
+# ================== 반별 큐브 ==================
+# 익명 이름 앞부분이 반 ("w1_001" -> "w1"), 형식이 다르면 "기타"
+COHORT_PATTERN = re.compile(r"^([A-Za-z]+\d+)_")
+OTHER_COHORT = "기타"
+
+
+def cohort_of(name):
+    match = COHORT_PATTERN.match(name) if isinstance(name, str) else None
+    return match.group(1) if match else OTHER_COHORT
+
+
+# 주간 롤업(lms_store.load_weekly_rollup) -> 반 × 주차 × 그룹 긴 표
+# 학생 주차 평균(합계 / 값이 있는 날 수) 을 그룹별로 더한 뒤 반 안에서 학생 평균
+def cohort_cube(rollup, accounts, groups=GROUPS):
+    cohorts = {a["id"]: cohort_of(a.get("name")) for a in accounts}
+    rollup = rollup[rollup["학생ID"].isin(cohorts.keys())]
+    columns = ["반", "주차번호", "주차", "그룹", "평균", "학생수"]
+    if rollup.empty:
+        return pd.DataFrame(columns=columns)
+
+    sums = rollup[[f"{c}|합계" for c in ALL_VARS]].to_numpy("float64")
+    counts = rollup[[f"{c}|일수" for c in ALL_VARS]].to_numpy("float64")
+    means = pd.DataFrame(sums / counts.clip(min=1), columns=ALL_VARS, index=rollup.index).where(counts > 0)
+    values = pd.DataFrame(
+        {name: means[vars_].sum(axis=1, min_count=1) for name, vars_ in groups.items()},
+        index=rollup.index,
+    )
+    values["반"] = rollup["학생ID"].map(cohorts)
+    values["주차번호"] = rollup["주차번호"]
+
+    cube = values.groupby(["반", "주차번호"]).agg(["mean", "count"])
+    cube.columns.names = ["그룹", "stat"]
+    cube = cube.stack("그룹", future_stack=True).reset_index()
+    cube.columns.name = None
+    cube = cube.rename(columns={"mean": "평균", "count": "학생수"})
+    cube["평균"] = cube["평균"].round(2)
+    cube["주차"] = cube["주차번호"].map(dict(zip(WEEK_TABLE["주차번호"], WEEK_TABLE["주차"])))
+    return cube[columns].sort_values(["반", "주차번호"], kind="stable").reset_index(drop=True)
+
+
+# ================== 목표 ==================
+# 목표 변수 (STAT_COLS 와 같은 순서) -> 저장소 목표 행의 컬럼
+GOAL_SOURCES = {var: var for var in STAT_COLS}
+GOAL_SOURCES["수면합"] = "수면(시간)"
+GOAL_SOURCES["공부총합"] = "전체합(시간)"
+
+
+# 저장소 목표 표(load_goals, index = 학생ID) -> 학생 × 목표 변수 float64 표 (빈 값 / 문자는 NaN)
+def goal_frame(df_goals):
+    goals = df_goals.reindex(columns=list(GOAL_SOURCES.values())).apply(pd.to_numeric, errors="coerce")
+    goals.columns = list(GOAL_SOURCES)
+    return goals.astype("float64")
+
+
+# 목표 행(시간 컬럼 Series) -> 목표 레코드 (목표 변수 index 의 float64 Series, 수면합 / 공부총합 포함)
+def goal_record(goal_row):
+    return goal_frame(goal_row.to_frame().T).iloc[0]
+
+
+# 학생 × 목표 변수 달성률 (실천 평균 / 목표 × 100, 목표가 없거나 0 이면 빈 칸)
+# stats: student_stats 결과, goals: goal_frame 결과
+def goal_attainment(stats, goals):
+    actual = stats.set_index("학생ID")[list(GOAL_SOURCES)]
+    goals = goals.reindex(actual.index.astype(str))
+    pct = actual.to_numpy("float64") / goals.where(goals > 0).to_numpy() * 100
+    return pd.DataFrame(pct, index=actual.index, columns=actual.columns).round(1).reset_index()
+
+
+# 학생ID 목록 + 계정 정보(익명, 실명) 를 통계 앞에 붙임
+def attach_accounts(stats, accounts):
+    info = pd.DataFrame(
+        [{"학생ID": a["id"], "익명": a.get("name"), "실명": a.get("real")} for a in accounts]
+    )
+    stats = stats.assign(학생ID=stats["학생ID"].astype(str))
+    return info.merge(stats, on="학생ID", how="inner")
+
+
+# 주간 리포트 요약
+def make_student_weekly_summary(df_student, student_goals):
+    if df_student.empty:
+        return "선택 주차에 데이터가 없습니다."
+
+    # 받은 표는 바꾸지 않음 (세션의 기록 표를 복사하지 않고 그대로 넘겨도 되도록)
+    totals = {
+        "수면합": df_student.get("낮잠(시간)",0) + df_student.get("밤잠(시간)",0),
+        "공부총합": df_student.get("국어합(시간)",0) + df_student.get("수학합(시간)",0) + \
+                    df_student.get("영어합(시간)",0) + df_student.get("탐구합(시간)",0),
+    }
+
+    avg_dict = {var: float(as_float64(values).mean()) for var, values in totals.items()}
+    summary = []
+
+    for var, avg in avg_dict.items():
+        goal = student_goals.get(var)
+        if goal is None or pd.isna(goal):
+            continue
+        diff = avg - goal
+        if var == "수면합":
+            if diff < -1:
+                summary.append(f"⚠️ 평균 수면시간이 목표보다 부족합니다 ({avg:.1f}시간 vs {goal}시간).")
+            elif diff > 1:
+                summary.append(f"⚠️ 평균 수면시간이 목표보다 많습니다 ({avg:.1f}시간 vs {goal}시간).")
+            else:
+                summary.append(f"💤 수면량이 목표에 잘 맞습니다 ({avg:.1f}시간).")
+        elif var == "공부총합":
+            if diff < -1:
+                summary.append(f"⚠️ 평균 공부시간이 목표보다 부족합니다 ({avg:.1f}시간 vs {goal}시간).")
+            else:
+                summary.append(f"📚 공부량이 목표에 잘 맞습니다 ({avg:.1f}시간).")
+
+    return summary
@@ -0,0 +1,229 @@
+import datetime
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from lms_config import HOUR_COLS, SEMESTER_END, SEMESTER_START
+
+# ================== 학생 일별 기록 로컬 저장소 (SQLite) ==================
+STORE_PATH = os.environ.get("LMS_STORE_PATH", os.path.join("data", "lms_store.sqlite3"))
+
+# 학생이 며칠 뒤에 채워 넣는 경우가 많아서 마지막 저장일 이전 며칠은 다시 반영
+STORE_LOOKBACK_DAYS = 7
+
+_COLS_SQL = ", ".join(f'"{c}" REAL' for c in HOUR_COLS)
+_COL_NAMES = ", ".join(f'"{c}"' for c in HOUR_COLS)
+_PLACEHOLDERS = ", ".join("?" for _ in HOUR_COLS)
+# 시간 칸이 하나라도 채워진 행 (날짜만 미리 적어 둔 빈 행은 제외)
+_HAS_VALUE_SQL = " OR ".join(f'"{c}" IS NOT NULL' for c in HOUR_COLS)
+
+# 주간 롤업: 학생 × 학기 주차(학기 시작일부터 7일 단위, lms_calendar 와 같은 번호)별
+# 시간 컬럼마다 합계와 값이 있는 날 수 -> 평균 = 합계 / 날 수
+_ROLLUP_COLS_SQL = ", ".join(f'"{c}|합계" REAL, "{c}|일수" INTEGER' for c in HOUR_COLS)
+_ROLLUP_COL_NAMES = ", ".join(f'"{c}|합계", "{c}|일수"' for c in HOUR_COLS)
+_ROLLUP_AGG_SQL = ", ".join(f'SUM("{c}"), COUNT("{c}")' for c in HOUR_COLS)
+_WEEK_NUM_SQL = "CAST((julianday(date) - julianday(:semester_start)) / 7 AS INTEGER) + 1"
+
+
+_initialized_paths = set()
+
+
+@contextmanager
+def _connect(path=None):
+    path = path or STORE_PATH
+    if path not in _initialized_paths:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if path not in _initialized_paths:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS daily_rows (
+                    student_id TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    {_COLS_SQL},
+                    PRIMARY KEY (student_id, date)
+                );
+                CREATE TABLE IF NOT EXISTS student_goals (
+                    student_id TEXT PRIMARY KEY,
+                    {_COLS_SQL}
+                );
+                CREATE TABLE IF NOT EXISTS student_meta (
+                    student_id TEXT PRIMARY KEY,
+                    last_date TEXT,
+                    updated_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS weekly_rollup (
+                    student_id TEXT NOT NULL,
+                    week_num INTEGER NOT NULL,
+                    days INTEGER NOT NULL,
+                    {_ROLLUP_COLS_SQL},
+                    PRIMARY KEY (student_id, week_num)
+                );
+            """)
+            # 롤업이 생기기 전에 쌓인 기록은 처음 한 번 채움
+            if conn.execute("SELECT COUNT(*) FROM weekly_rollup").fetchone()[0] == 0:
+                _refresh_rollup(conn)
+                conn.commit()
+            _initialized_paths.add(path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# student_id 의 from_date 이후 주차 롤업을 daily_rows 에서 다시 계산 (student_id 가 None 이면 전체)
+def _refresh_rollup(conn, student_id=None, from_date=None):
+    params = {"semester_start": SEMESTER_START, "semester_end": SEMESTER_END,
+              "student_id": student_id, "from_date": from_date or SEMESTER_START}
+    from_week = "CAST((julianday(:from_date) - julianday(:semester_start)) / 7 AS INTEGER) + 1"
+    student_filter = "" if student_id is None else "student_id = :student_id AND "
+    conn.execute(
+        f"DELETE FROM weekly_rollup WHERE {student_filter}week_num >= MAX(1, {from_week})", params
+    )
+    conn.execute(
+        f"INSERT INTO weekly_rollup (student_id, week_num, days, {_ROLLUP_COL_NAMES}) "
+        f"SELECT student_id, {_WEEK_NUM_SQL} AS week_num, COUNT(*), {_ROLLUP_AGG_SQL} "
+        f"FROM daily_rows WHERE {student_filter}date BETWEEN :semester_start AND :semester_end "
+        f"AND {_WEEK_NUM_SQL} >= MAX(1, {from_week}) "
+        f"GROUP BY student_id, week_num",
+        params,
+    )
+
+
+def last_stored_date(student_id, path=None):
+    with _connect(path) as conn:
+        row = conn.execute(
+            "SELECT last_date FROM student_meta WHERE student_id = ?", (student_id,)
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return pd.Timestamp(row[0])
+
+
+def _hour_values(df):
+    values = df.reindex(columns=HOUR_COLS)
+    # parse_sheet_csv 로 읽은 시트는 이미 float64, 그 밖의 입력만 숫자로 변환
+    text_cols = [c for c in HOUR_COLS if not pd.api.types.is_numeric_dtype(values[c])]
+    if text_cols:
+        values[text_cols] = values[text_cols].apply(pd.to_numeric, errors="coerce")
+    # sqlite에는 NaN 대신 NULL
+    return values.astype(object).where(values.notna(), None)
+
+
+# 정규화된 시트(첫 행 = 목표)를 저장소에 반영
+# full=False 이면 마지막 저장일 - STORE_LOOKBACK_DAYS 이후 행만 처리
+# 반환값: 반영한 일별 행 수
+def upsert_sheet(student_id, df_sheet, full=False, path=None):
+    if "일시" not in df_sheet.columns:
+        raise ValueError("'일시' 컬럼 없음")
+
+    goal_values = _hour_values(df_sheet.head(1))
+
+    dates = pd.to_datetime(df_sheet["일시"], errors="coerce").dt.normalize()
+    df = df_sheet.assign(일시=dates).dropna(subset=["일시"])
+
+    last = None if full else last_stored_date(student_id, path)
+    if last is not None:
+        df = df[df["일시"] >= last - pd.Timedelta(days=STORE_LOOKBACK_DAYS)]
+    df = df.drop_duplicates(subset=["일시"], keep="last")
+
+    rows = []
+    if not df.empty:
+        values = _hour_values(df)
+        date_strs = df["일시"].dt.strftime("%Y-%m-%d").tolist()
+        rows = [
+            (student_id, d, *vals)
+            for d, vals in zip(date_strs, values.itertuples(index=False, name=None))
+        ]
+
+    with _connect(path) as conn:
+        if full:
+            conn.execute("DELETE FROM daily_rows WHERE student_id = ?", (student_id,))
+        if rows:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO daily_rows (student_id, date, {_COL_NAMES}) "
+                f"VALUES (?, ?, {_PLACEHOLDERS})",
+                rows,
+            )
+        if not goal_values.empty:
+            conn.execute(
+                f"INSERT OR REPLACE INTO student_goals (student_id, {_COL_NAMES}) "
+                f"VALUES (?, {_PLACEHOLDERS})",
+                (student_id, *goal_values.iloc[0].tolist()),
+            )
+        # 바뀐 날짜가 들어 있는 주차부터 롤업 갱신
+        if full or rows:
+            _refresh_rollup(conn, student_id, None if full else min(r[1] for r in rows))
+        # 마지막 저장일은 실제 기록이 있는 날 기준
+        # (시트에 앞으로의 날짜가 미리 채워져 있으면 그 끝으로 잡혀 이후 기록을 계속 건너뜀)
+        new_last = conn.execute(
+            f"SELECT MAX(date) FROM daily_rows WHERE student_id = ? AND ({_HAS_VALUE_SQL})",
+            (student_id,),
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO student_meta (student_id, last_date, updated_at) VALUES (?, ?, ?)",
+            (student_id, new_last, datetime.datetime.now().isoformat(timespec="seconds")),
+        )
+
+    return len(rows)
+
+
+# 일별 기록 조회 (학생ID, 일시, 시간 컬럼)
+def load_rows(student_ids=None, start=None, end=None, path=None):
+    where = []
+    params = []
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        where.append(f"student_id IN ({', '.join('?' for _ in student_ids)})")
+        params.extend(student_ids)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+
+    sql = f"SELECT student_id, date, {_COL_NAMES} FROM daily_rows"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY student_id, date"
+
+    with _connect(path) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    df = df.rename(columns={"student_id": "학생ID", "date": "일시"})
+    df["일시"] = pd.to_datetime(df["일시"], format="%Y-%m-%d")
+    df[HOUR_COLS] = df[HOUR_COLS].astype("float64")
+    return df
+
+
+# 주간 롤업 조회 (학생ID, 주차번호, days, "<컬럼>|합계", "<컬럼>|일수")
+def load_weekly_rollup(student_ids=None, path=None):
+    sql = f"SELECT student_id, week_num, days, {_ROLLUP_COL_NAMES} FROM weekly_rollup"
+    params = []
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        sql += f" WHERE student_id IN ({', '.join('?' for _ in student_ids)})"
+        params.extend(student_ids)
+    sql += " ORDER BY student_id, week_num"
+    with _connect(path) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    return df.rename(columns={"student_id": "학생ID", "week_num": "주차번호"})
+
+
+# 학생별 목표 행 조회 (index = 학생ID, 컬럼 = 시간 컬럼)
+def load_goals(student_ids=None, path=None):
+    sql = f"SELECT student_id, {_COL_NAMES} FROM student_goals"
+    params = []
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        sql += f" WHERE student_id IN ({', '.join('?' for _ in student_ids)})"
+        params.extend(student_ids)
+    with _connect(path) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    df = df.rename(columns={"student_id": "학생ID"}).set_index("학생ID")
+    return df.astype("float64")
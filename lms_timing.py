@@ -0,0 +1,107 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# ================== 단계별 시간 측정 ==================
+# span("fetch", key=sheet_id) 로 감싼 구간의 시간을 프로세스 전체에서 모아 둠
+# 각 기록은 한 줄짜리 JSON 로그로도 남김 (logger "lms.timing")
+TIMING_MAX_RECORDS = int(os.environ.get("LMS_TIMING_MAX_RECORDS", 5000))
+
+# 관리자 진단 탭에 보여 줄 단계 순서
+STAGES = ["fetch", "parse", "normalize", "store", "load", "aggregate", "figure", "export", "page"]
+
+logger = logging.getLogger("lms.timing")
+
+# LMS_TIMING_LOG=1 이면 표준 에러로 기록을 한 줄씩 출력
+if os.environ.get("LMS_TIMING_LOG") == "1" and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# 지금 실행 중인 페이지 실행(rerun) 번호 / 이름 (스레드 풀로 넘길 때는 contextvars 복사)
+_current_run = contextvars.ContextVar("lms_current_run", default=(None, None))
+_run_ids = itertools.count(1)
+
+
+class TimingLog:
+    def __init__(self, max_records=TIMING_MAX_RECORDS):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, key=None):
+        run_id, run_name = _current_run.get()
+        record = {
+            "stage": stage, "key": key, "ms": round(seconds * 1000, 2),
+            "run": run_id, "page": run_name, "at": time.time(),
+        }
+        with self._lock:
+            self._records.append(record)
+        logger.info(json.dumps({"event": "timing", **record}, ensure_ascii=False))
+
+    def frame(self):
+        with self._lock:
+            records = list(self._records)
+        return pd.DataFrame(records, columns=["stage", "key", "ms", "run", "page", "at"])
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    # 단계별 횟수 / p50 / p95 / 최대 (ms)
+    def summary(self):
+        df = self.frame()
+        stats = df.groupby("stage")["ms"].agg(
+            횟수="count",
+            p50=lambda s: s.quantile(0.5),
+            p95=lambda s: s.quantile(0.95),
+            최대="max",
+        ).round(1)
+        order = [s for s in STAGES if s in stats.index] + [s for s in stats.index if s not in STAGES]
+        return stats.reindex(order).reset_index()
+
+    # 시트(key)별로 가장 느린 것부터 (fetch + parse + normalize 합)
+    def slowest_sheets(self, n=10):
+        df = self.frame()
+        df = df[df["stage"].isin(["fetch", "parse", "normalize"]) & df["key"].notna()]
+        per_sheet = df.pivot_table(index="key", columns="stage", values="ms", aggfunc="median")
+        per_sheet["합계"] = per_sheet.sum(axis=1)
+        return per_sheet.round(1).sort_values("합계", ascending=False).head(n).reset_index()
+
+    # 페이지 실행별 단계 합계 (최근 실행부터)
+    def runs(self, n=20):
+        df = self.frame().dropna(subset=["run"]).rename(columns={"run": "실행", "page": "화면"})
+        per_run = df.pivot_table(index=["실행", "화면"], columns="stage", values="ms", aggfunc="sum")
+        per_run = per_run[[s for s in STAGES if s in per_run.columns]]
+        return per_run.round(1).sort_index(ascending=False).head(n).reset_index()
+
+
+timing_log = TimingLog()
+
+
+@contextmanager
+def span(stage, key=None):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing_log.add(stage, time.perf_counter() - t0, key)
+
+
+# 페이지 한 번 실행 전체를 "page" 단계로 기록하고, 그 안의 span 에 실행 번호를 붙임
+@contextmanager
+def page_run(name):
+    token = _current_run.set((next(_run_ids), name))
+    try:
+        with span("page", key=name):
+            yield
+    finally:
+        _current_run.reset(token)
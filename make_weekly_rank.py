@@ -0,0 +1,80 @@
+import argparse
+import datetime
+import os
+import sys
+
+import pandas as pd
+
+from lms_accounts import account_index
+from lms_calendar import WEEK_TABLE
+from lms_ranks import rank_paths, write_rank_files
+from lms_report import RANK_DIR, build_report, sync_students
+from lms_sheets import FETCH_MAX_WORKERS
+
+# ================== 주간 순위 파일 일괄 생성 ==================
+# 예) 지난 주 순위:            python make_weekly_rank.py
+#     특정 주차 (3, 4주차):     python make_weekly_rank.py --week 3 --week 4
+#     끝난 주차 전체 (없는 것만): python make_weekly_rank.py --all-completed
+#     (cron 예시) 매주 일요일 01:00 → 0 1 * * 0 cd /app && python make_weekly_rank.py
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="weekly_rank/rank*.xlsx 생성")
+    parser.add_argument("--week", type=int, action="append", default=[],
+                        help="주차 번호 (여러 번 지정 가능)")
+    parser.add_argument("--all-completed", action="store_true",
+                        help="오늘 이전에 끝난 모든 주차")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="이미 있는 순위 파일도 다시 생성")
+    parser.add_argument("--refresh", action="store_true",
+                        help="시트 캐시를 무시하고 새로 받기")
+    parser.add_argument("--workers", type=int, default=FETCH_MAX_WORKERS,
+                        help="동시 다운로드 수")
+    parser.add_argument("--out-dir", default=RANK_DIR)
+    parser.add_argument("--today", type=datetime.date.fromisoformat,
+                        default=datetime.date.today(), help="기준일 (YYYY-MM-DD)")
+    return parser.parse_args(argv)
+
+
+def select_weeks(args):
+    completed = WEEK_TABLE[WEEK_TABLE["end"] < pd.Timestamp(args.today)]
+    if args.week:
+        unknown = set(args.week) - set(WEEK_TABLE["주차번호"])
+        if unknown:
+            raise SystemExit(f"없는 주차 번호: {sorted(unknown)}")
+        return WEEK_TABLE[WEEK_TABLE["주차번호"].isin(args.week)]
+    if args.all_completed:
+        return completed
+    return completed.tail(1)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    weeks = select_weeks(args)
+
+    if not args.overwrite:
+        exists = [
+            any(os.path.exists(p) for p in rank_paths(s, e, args.out_dir))
+            for s, e in zip(weeks["start"], weeks["end"])
+        ]
+        weeks = weeks[[not x for x in exists]]
+    if weeks.empty:
+        print("생성할 주차가 없습니다.")
+        return 0
+
+    students = account_index.students()
+    print(f"학생 {len(students)}명 시트 다운로드 중...")
+    stored_ids, failed_rows = sync_students(students, refresh=args.refresh, max_workers=args.workers)
+    for row in failed_rows:
+        print(f"  실패 {row['학생ID']} ({row['익명']}): {row['사유']}", file=sys.stderr)
+
+    for _, week in weeks.iterrows():
+        result_df, *_ = build_report(students, stored_ids, week["start"], week["end"])
+        parquet_path, xlsx_path = write_rank_files(result_df, week["start"], week["end"], args.out_dir)
+        print(f"{week['주차']} → {parquet_path}, {xlsx_path} ({len(result_df)}명)")
+
+    return 1 if failed_rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,106 +1,25 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
 import datetime
-import plotly.express as px
-import io
+
+from lms_accounts import account_index
+from lms_calendar import PRESET_PERIODS, WEEK_NUMBERS, add_week_columns
+from lms_charts import goal_actual_figure, goal_attainment_figure, rolling_trend_figure, stacked_bar_figure
+from lms_config import MIN_SLEEP_HOURS, GROUPS, DISPLAY_COLS
+from lms_export import EXPORT_FORMATS, export_attainment, export_matrix, export_report
+from lms_frames import as_float64, live_frames, memory_report, student_frame
+from lms_prefetch import prefetcher
+from lms_ranks import format_rank_delta, rank_cache
+from lms_report import build_report, student_goals, sync_students
+from lms_sheets import get_sheet, schema_registry, sheet_cache
+from lms_stats import DAILY_TARGETS, GOAL_SOURCES, cohort_cube, make_student_weekly_summary, rolling_trends
+from lms_store import upsert_sheet, load_rows, load_weekly_rollup
+from lms_timing import STAGES, page_run, span, timing_log
 
 # ================== 기본 설정 ==================
 st.set_page_config(page_title="학습 관리 시스템", layout="centered")
 
-# ================== GitHub 주간 순위 ==================
-BASE_GITHUB_URL = (
-    "https://raw.githubusercontent.com/kimkeunmin-cell/dblms2026/main/weekly_rank"
-)
-
-ACCOUNTS_FILE = "accounts.csv"
-SHEETS_FILE = "sheets.csv"
-
-# ---------- 기준값 ----------
-MIN_STUDY_HOURS = 45.5    # 주당 최소 공부 시간 (6.5h * 7)
-MIN_SLEEP_HOURS = 45.5    # 주당 최소 수면 시간 (6.5h * 7)
-
-
-# 변수 정의
-GROUPS = {
-    "수면": ["낮잠(시간)", "밤잠(시간)"],
-    "종합": ["국어합(시간)", "수학합(시간)", "영어합(시간)", "탐구합(시간)"],
-    "국어": ["문학(시간)", "비문학(시간)", "화언(시간)", "국어기타(시간)"],
-    "수학": ["대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)"],
-    "영어": ["어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)"],
-    "탐구": ["통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)"]
-}
-
-# GROUPS 전체 변수 (중복 제거)
-ALL_VARS = []
-for vars_ in GROUPS.values():
-    for v in vars_:
-        if v not in ALL_VARS:
-            ALL_VARS.append(v)
-
-# 합산 대상
-SUM_VARS = ["국어합(시간)", "수학합(시간)", "영어합(시간)", "탐구합(시간)"]
-
-# 주간 리포트용 기간
-PRESET_PERIODS = {
-    "1주차 (3/1~3/7)": ("2026-03-01", "2026-03-07"),
-    "2주차 (3/8~3/14)": ("2026-03-08", "2026-03-14"),
-    "3주차 (3/15~3/21)": ("2026-03-15", "2026-03-21"),
-    "4주차 (3/22~3/28)": ("2026-03-22", "2026-03-28"),
-    "5주차 (3/29~4/4)": ("2026-03-29", "2026-04-04"),
-    "6주차 (4/5~4/11)": ("2026-04-05", "2026-04-11"),
-    "7주차 (4/12~4/18)": ("2026-04-12", "2026-04-18"),
-    "8주차 (4/19~4/25)": ("2026-04-19", "2026-04-25"),
-    "9주차 (4/26~5/2)": ("2026-04-26", "2026-05-02"),
-    "10주차 (5/3~5/9)": ("2026-05-03", "2026-05-09"),
-    "11주차 (5/10~5/16)": ("2026-05-10", "2026-05-16"),
-    "12주차 (5/17~5/23)": ("2026-05-17", "2026-05-23"),
-    "13주차 (5/24~5/30)": ("2026-05-24", "2026-05-30"),
-    "14주차 (5/31~6/6)": ("2026-05-31", "2026-06-06"),
-    "15주차 (6/7~6/13)": ("2026-06-07", "2026-06-13"),
-    "16주차 (6/14~6/20)": ("2026-06-14", "2026-06-20"),
-    "17주차 (6/21~6/27)": ("2026-06-21", "2026-06-27"),
-    "18주차 (6/28~7/4)": ("2026-06-28", "2026-07-04"),
-    "19주차 (7/5~7/11)": ("2026-07-05", "2026-07-11"),
-    "20주차 (7/12~7/18)": ("2026-07-12", "2026-07-18"),
-    "21주차 (7/19~7/25)": ("2026-07-19", "2026-07-25"),
-    "22주차 (7/26~8/1)": ("2026-07-26", "2026-08-01"),
-    "23주차 (8/2~8/8)": ("2026-08-02", "2026-08-08"),
-    "24주차 (8/9~8/15)": ("2026-08-09", "2026-08-15"),
-    "25주차 (8/16~8/22)": ("2026-08-16", "2026-08-22"),
-    "26주차 (8/23~8/29)": ("2026-08-23", "2026-08-29"),
-    "27주차 (8/30~9/5)": ("2026-08-30", "2026-09-05"),
-    "28주차 (9/6~9/12)": ("2026-09-06", "2026-09-12"),
-    "29주차 (9/13~9/19)": ("2026-09-13", "2026-09-19"),
-    "30주차 (9/20~9/26)": ("2026-09-20", "2026-09-26"),
-    "31주차 (9/27~10/3)": ("2026-09-27", "2026-10-03"),
-    "32주차 (10/4~10/10)": ("2026-10-04", "2026-10-10"),
-    "33주차 (10/11~10/17)": ("2026-10-11", "2026-10-17"),
-    "34주차 (10/18~10/24)": ("2026-10-18", "2026-10-24"),
-    "35주차 (10/25~10/31)": ("2026-10-25", "2026-10-31"),
-    "36주차 (11/1~11/7)": ("2026-11-01", "2026-11-07"),
-    "37주차 (11/8~11/14)": ("2026-11-08", "2026-11-14"),
-    "38주차 (11/15~11/21)": ("2026-11-15", "2026-11-21"),
-    "39주차 (11/22~11/28)": ("2026-11-22", "2026-11-28"),
-    "40주차 (11/29~12/5)": ("2026-11-29", "2026-12-05"),
-    "41주차 (12/6~12/12)": ("2026-12-06", "2026-12-12"),
-    "42주차 (12/13~12/19)": ("2026-12-13", "2026-12-19"),
-    "43주차 (12/20~12/26)": ("2026-12-20", "2026-12-26"),
-    "44주차 (12/27~12/31)": ("2026-12-27", "2026-12-31")}
-
-# 통계 다운로드용
-def dataframe_to_xlsx_bytes(df, sheet_name="통계"):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(
-            writer,
-            index=False,
-            sheet_name=sheet_name
-        )
-    output.seek(0)
-    return output
-
 # 교사용 코멘트 (여러 가지 경우의 수 만들어야 함) #######################################################################################
 def make_teacher_comment_soft(curr, prev):
     study_diff = curr["공부총합"] - prev["공부총합"]
@@ -128,50 +47,17 @@ def make_teacher_comment_soft(curr, prev):
 
 # 교사용 코멘트 (여러 가지 경우의 수 만들어야 함) #######################################################################################
 
-# 주간 리포트 요약
-def make_student_weekly_summary(df_student, student_goals):
-    if df_student.empty:
-        return "선택 주차에 데이터가 없습니다."
-
-    df_student["수면합"] = df_student.get("낮잠(시간)",0) + df_student.get("밤잠(시간)",0)
-    df_student["공부총합"] = df_student.get("국어합(시간)",0) + df_student.get("수학합(시간)",0) + \
-                              df_student.get("영어합(시간)",0) + df_student.get("탐구합(시간)",0)
-
-    avg_dict = {var: df_student[var].mean() for var in ["수면합","공부총합"]}
-    summary = []
-
-    for var, avg in avg_dict.items():
-        goal = student_goals.get(var)
-        if goal is None:
-            continue
-        diff = avg - goal
-        if var == "수면합":
-            if diff < -1:
-                summary.append(f"⚠️ 평균 수면시간이 목표보다 부족합니다 ({avg:.1f}시간 vs {goal}시간).")
-            elif diff > 1:
-                summary.append(f"⚠️ 평균 수면시간이 목표보다 많습니다 ({avg:.1f}시간 vs {goal}시간).")
-            else:
-                summary.append(f"💤 수면량이 목표에 잘 맞습니다 ({avg:.1f}시간).")
-        elif var == "공부총합":
-            if diff < -1:
-                summary.append(f"⚠️ 평균 공부시간이 목표보다 부족합니다 ({avg:.1f}시간 vs {goal}시간).")
-            else:
-                summary.append(f"📚 공부량이 목표에 잘 맞습니다 ({avg:.1f}시간).")
-
-    return summary
-
 # ================== 로그인 ==================
 def check_login(user_id, user_pw):
     try:
-        df = pd.read_csv(ACCOUNTS_FILE, dtype=str)
+        account = account_index.account(user_id)
     except Exception as e:
         st.warning(f"accounts.csv 읽기 실패: {e}")
         return None
 
-    row = df[(df["id"] == user_id) & (df["password"] == user_pw)]
-    if row.empty:
+    if account is None or account.get("password") != user_pw:
         return None
-    return row.iloc[0]
+    return account
 
 def login_page():
     st.title("휘문고 DB-LMS 로그인")
@@ -185,7 +71,7 @@ def login_page():
         user = check_login(user_id, user_pw)
         if user is not None:
             st.session_state["logged_in"] = True
-            st.session_state["user_id"] = user_id
+            st.session_state["user_id"] = user["id"]
             st.session_state["role"] = user.get("role", "student")
             st.rerun()
         else:
@@ -195,11 +81,8 @@ def login_page():
 def student_page():
     current_user_id = st.session_state["user_id"]
 
-    df_accounts = pd.read_csv(ACCOUNTS_FILE, dtype=str)
-    df_accounts["id"] = df_accounts["id"].str.strip()
-
-    row = df_accounts[df_accounts["id"] == current_user_id]
-    student_name = row.iloc[0]["name"] if not row.empty else "이름없음"
+    account = account_index.account(current_user_id)
+    student_name = account["name"] if account is not None else "이름없음"
     
     # st.title("학생 페이지")
     st.title(f" 익명 : {student_name} · 학번 : {current_user_id}")
@@ -264,7 +147,7 @@ def student_page():
 
     # ===================== ADMIN =====================
     if st.session_state["role"] == "admin":
-        tabs = st.tabs(["🧑‍🏫 관리자"])
+        tabs = st.tabs(["🧑‍🏫 관리자", "🏫 반별 비교", "🩺 진단"])
 
         with tabs[0]:
             st.subheader("🧑‍🏫 전체 학생 · 전체 과목 주간 통계 CSV")
@@ -300,175 +183,122 @@ def student_page():
             end_date = pd.to_datetime(PRESET_PERIODS[admin_end_week][1]) 
 
 
-            df_accounts = pd.read_csv(ACCOUNTS_FILE, dtype=str)
-            df_sheets = pd.read_csv(SHEETS_FILE, dtype=str)
-            df_accounts["id"] = df_accounts["id"].str.strip()
-            df_sheets["id"] = df_sheets["id"].str.strip()
+            students = account_index.students()
+            sheet_ids = account_index.sheet_ids()
+            st.write("학생 수:", len(students))
+            st.write("시트 연결된 학생 수:", len(sheet_ids))
+            st.write("📋 시트 연결 ID 목록:", sheet_ids)
 
+            if not students:
+                st.warning("학생 계정이 없습니다.")
 
-            students_df = df_accounts[df_accounts["role"] == "student"]
-            st.write("학생 수:", len(students_df))
-            st.write("시트 연결된 학생 수:", len(df_sheets))
-            st.write("📋 시트 연결 ID 목록:", df_sheets["id"].tolist())
+            # 시트 캐시 상태
+            cache_stats = sheet_cache.stats()
+            st.caption(
+                f"🗂 시트 캐시: {cache_stats['entries']}/{cache_stats['max_entries']}개 · "
+                f"TTL {cache_stats['ttl']}초 · 적중 {cache_stats['hits']} / 미적중 {cache_stats['misses']} "
+                f"({cache_stats['hit_rate']:.0%}) · 축출 {cache_stats['evictions']}"
+            )
+            if st.button("🔄 시트 캐시 비우기", key="admin_cache_clear"):
+                sheet_cache.invalidate()
+                st.rerun()
 
-            if students_df.empty:
-                st.warning("학생 계정이 없습니다.")
+            export_fmt = st.radio(
+                "내보내기 형식", list(EXPORT_FORMATS), horizontal=True, key="admin_export_format"
+            )
 
             if st.button("📥 전체 과목 주간 통계 CSV 생성"):
-                all_results = []
+                # 전체 시트 병렬 다운로드 + 저장소 반영
+                progress_bar = st.progress(0.0, text="시트 다운로드 준비 중...")
+
+                def update_progress(done, total, key):
+                    progress_bar.progress(done / total, text=f"시트 다운로드 {done}/{total} ({key})")
+
+                stored_ids, failed_rows = sync_students(students, on_progress=update_progress)
+                progress_bar.empty()
 
                 with st.spinner("학생 데이터 처리 중..."):
-                    # 주차 테이블
-                    week_rows = []
-                    for i in range(start_idx, end_idx + 1):
-                        w = week_keys[i]
-                        s, e = PRESET_PERIODS[w]
-                        week_rows.append({
-                            "주차번호": int(w.split("주차")[0]),
-                            "주차": w,
-                            "start": pd.to_datetime(s),
-                            "end": pd.to_datetime(e)
-                        })
-                    df_weeks = pd.DataFrame(week_rows)
-
-                    for w, (s, e) in PRESET_PERIODS.items():
-                        week_rows.append({
-                            "주차번호": int(w.split("주차")[0]),
-                            "주차": w,
-                            "start": pd.to_datetime(s),
-                            "end": pd.to_datetime(e)
-                        })
-                    df_weeks = pd.DataFrame(week_rows)
-                    
-                    # 학생별 처리
-                    for _, acc in students_df.iterrows():
-                        user_id = acc["id"]
-                        student_name = acc["name"]
-                        real_name = acc["real"]
-                        
-                        row_sheet = df_sheets[df_sheets["id"] == user_id]
-                        if row_sheet.empty:
-                            continue
-
-                        sheet_url = row_sheet.iloc[0]["sheet_url"]
-                        if "/d/" not in sheet_url:
-                            continue
-
-                        sheet_id = sheet_url.split("/d/")[1].split("/")[0]
-                        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
-
-                        try:
-                            df = pd.read_csv(csv_url, engine="python", on_bad_lines="skip")
-                            # 컬럼 정규화
-                            df.columns = (
-                                df.columns
-                                .str.strip()
-                                .str.replace('\r','',regex=False)
-                                .str.replace('\n','',regex=False)
-                                .str.replace(' ','',regex=False)
-                                .str.replace('　','',regex=False)
-                            )                       
-                        except:
-                            continue
-
-                        if "일시" not in df.columns:
-                            continue
-
-                        # 목표 추출
-                        goals = {}
-                        for var in ALL_VARS:
-                            goals[var] = float(df.get(var, [0])[0])
-                        goals["수면합"]=float(df.get("수면(시간)", [0])[0])  
-                        goals["공부총합"]=float(df.get("전체합(시간)", [0])[0])
-                        
-                        df["일시"] = pd.to_datetime(df["일시"], errors="coerce")
-                        df = df.dropna(subset=["일시"])
-                        df = df[(df["일시"] >= start_date) & (df["일시"] <= end_date)]
-
-                        for v in ALL_VARS:
-                            if v not in df.columns:
-                                df[v] = np.nan
-                            else:
-                                df[v] = pd.to_numeric(df[v], errors="coerce")
-
-                        means = df[ALL_VARS].mean()
-               
-                        row_data = {"학생ID": user_id, "익명": student_name, "실명":real_name}
-
-                        for v in ALL_VARS:
-                            row_data[v] = round(means.get(v, np.nan), 2)
-
-                        total_sum = 0
-                        for v in SUM_VARS:
-                            val = row_data.get(v)
-                            if not pd.isna(val):
-                                total_sum += val
-
-                        sleep_sum = 0
-                        for i in ["낮잠(시간)", "밤잠(시간)"]:
-                            vv = row_data.get(i)
-                            if not pd.isna(vv):
-                                sleep_sum += vv
-
-                        row_data["수면합"] = round(sleep_sum, 2)
-                        row_data["공부총합"] = round(total_sum, 2)
-                        all_results.append(row_data)
+                    # 집계는 저장소에서 기간만 읽어 학생 × 날짜 패널 하나로 처리
+                    (result_df, group_df, weekly_df, summaries,
+                     matrix_df, attainment_df, goal_df) = build_report(students, stored_ids, start_date, end_date)
 
                 # -------------------------------
                 # 결과 처리
                 # -------------------------------
-                if not all_results:
-                    st.warning("생성된 데이터가 없습니다.")
-        
-                result_df = pd.DataFrame(all_results)
-                final_cols = ["학생ID", "익명", "실명", "낮잠(시간)", "밤잠(시간)", "수면합", 
-                              "문학(시간)", "비문학(시간)", "화언(시간)", "국어기타(시간)", "국어합(시간)",
-                              "대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)", "수학합(시간)",
-                              "어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)", "영어합(시간)",
-                              "통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)", "탐구합(시간)", "공부총합"]
-                result_df = result_df[final_cols]
-
-                result_df["순위"] = result_df["공부총합"].rank(method='min', ascending=False)
- 
-                # 학생
-                summary_rows = []
-
-                for student_id, df_s in result_df.groupby("학생ID"):
-                    summary_rows.append({
-                        "학생ID": student_id,
-                        "요약": make_student_weekly_summary(df, goals)
-                    })
-
-                summary_df = pd.DataFrame(summary_rows)
-
-                result_df = result_df.merge(summary_df, on="학생ID", how="left")
-         
-                st.success("CSV 생성 완료!")
-                st.markdown("### 👀 CSV 미리보기 (상위 100행)")
-                st.dataframe(
-                    result_df.head(100),
-                    use_container_width=True
-                )
-                xlsx_bytes = dataframe_to_xlsx_bytes(
-                    result_df,
-                    sheet_name="전체학생_주간통계"
-                )
+                if failed_rows:
+                    with st.expander(f"⚠️ 불러오지 못한 학생 {len(failed_rows)}명", expanded=True):
+                        st.dataframe(pd.DataFrame(failed_rows), use_container_width=True, hide_index=True)
 
-                st.download_button(
-                    label="⬇️ 전체 학생 주간 통계 XLSX 다운로드",
-                    data=xlsx_bytes,
-                    file_name="전체학생_전체과목_주간통계.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="admin_weekly_xlsx_download"
-                )
-        
-                st.markdown("### 📝 학생별 자동 요약")
+                # 시트를 하나도 못 받은 경우에도 반별 비교 / 진단 탭과 로그아웃 버튼은 그려야 해서 st.stop() 대신 건너뜀
+                if result_df.empty:
+                    st.warning("생성된 데이터가 없습니다.")
+                else:
+                    st.success("CSV 생성 완료!")
+                    st.markdown("### 👀 CSV 미리보기 (상위 100행)")
+                    st.dataframe(
+                        result_df.head(100),
+                        use_container_width=True
+                    )
 
-                for student_id, df_s in result_df.groupby("학생ID"):
-                    summary = make_student_weekly_summary(df, goals)
-                    st.info(f"👤 {student_id} : {summary}")
+                    # 파일은 다운로드를 누를 때 디스크 임시 파일로 생성 (요약 시트 + 주차별 시트)
+                    ext, mime = EXPORT_FORMATS[export_fmt]
+                    st.download_button(
+                        label=f"⬇️ 전체 학생 주간 통계 {export_fmt} 다운로드",
+                        data=lambda: export_report(export_fmt, result_df, weekly_df),
+                        file_name=f"전체학생_전체과목_주간통계.{ext}",
+                        mime=mime,
+                        on_click="ignore",
+                        key="admin_weekly_xlsx_download"
+                    )
 
+                    # 학생 × 변수(평균/합계) × 주차: 선택한 주차 범위의 주별 변화를 한 번에
+                    with st.expander("🗓 학생 × 주차 행렬 (주차별 평균 / 합계)"):
+                        st.dataframe(matrix_df.head(200), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            label=f"⬇️ 학생 × 주차 행렬 {export_fmt} 다운로드",
+                            data=lambda: export_matrix(export_fmt, matrix_df),
+                            file_name=f"전체학생_주차별_행렬.{ext}",
+                            mime=mime,
+                            on_click="ignore",
+                            key="admin_weekly_matrix_download"
+                        )
         
+                    # 학생 × 변수 목표 달성률 (기간 평균 / 목표, %)
+                    with st.expander("🎯 목표 달성률 (실천 평균 / 목표, %)"):
+                        st.caption("100 이상이면 목표 달성입니다. 목표가 비어 있거나 0 인 칸은 비워 둡니다.")
+                        st.dataframe(attainment_df, use_container_width=True, hide_index=True)
+
+                        # 전체 학생 × 변수를 한 그림으로 (초록 달성 / 빨강 미달 / 회색 목표 없음)
+                        goal_vars = list(GOAL_SOURCES)
+                        goals = goal_df.reindex(index=result_df["학생ID"], columns=goal_vars)
+                        fig = goal_attainment_figure(
+                            result_df["익명"], goal_vars, result_df[goal_vars].to_numpy("float64"), goals.to_numpy()
+                        )
+                        st.plotly_chart(fig, use_container_width=True, key="admin_attainment_chart")
+                        st.download_button(
+                            label=f"⬇️ 목표 달성률 {export_fmt} 다운로드",
+                            data=lambda: export_attainment(export_fmt, attainment_df),
+                            file_name=f"전체학생_목표달성률.{ext}",
+                            mime=mime,
+                            on_click="ignore",
+                            key="admin_attainment_download"
+                        )
+
+                    with st.expander("📚 과목 그룹별 평균 합계"):
+                        st.dataframe(group_df, use_container_width=True, hide_index=True)
+
+                    st.markdown("### 📝 학생별 자동 요약")
+
+                    for student_id, summary in summaries.items():
+                        st.info(f"👤 {student_id} : {summary}")
+
+
+        with tabs[1]:
+            admin_cohort_compare()
+
+        with tabs[2]:
+            admin_diagnostics()
+
         if st.button("🔙 로그아웃"):
             st.session_state.clear()
             st.rerun()
@@ -478,796 +308,649 @@ def student_page():
             ["📅 직접 기간 선택", "📊 주간별 리포트", "📈 주간 평균 변화", "🏆 주간 공부 시간 순위"]
         )
 
-    # ---------------- TAB 1 ----------------
+    # Google Sheet 정보 + 학생 데이터 (모든 탭 공용)
     with tab1:
-        st.subheader("직접 기간 선택")
-        st.write("직접 시작일과 종료일을 선택해서 차트를 볼 수 있습니다.")
-        st.markdown("<div class='section-title'>📱 화면 환경 선택</div>", unsafe_allow_html=True)
+        try:
+            sheet = account_index.sheet(current_user_id)
+        except Exception:
+            st.warning("시트 정보를 불러올 수 없습니다.")
+            st.stop()
+        if sheet is None:
+            st.warning("시트가 연결되지 않았습니다.")
+            st.stop()
+        df_csv, goals = load_student_data(current_user_id, sheet)
+        tab_direct_range(current_user_id, sheet, df_csv, goals)
+    with tab2:
+        tab_weekly_report(current_user_id, df_csv, goals)
+    with tab3:
+        tab_weekly_trend(current_user_id, df_csv)
+    with tab4:
+        tab_weekly_rank(current_user_id)
 
-        # 저장된 선택값 유지
-        if "device" not in st.session_state:
-            st.session_state["device"] = "PC"
+    # 로그아웃
+    if st.button("🔙 로그아웃"):
+        st.session_state.clear()
+        st.rerun()
 
-        # ------------------ 토글 버튼 랜더링 ------------------
-        st.markdown("<div class='toggle-container'>", unsafe_allow_html=True)
+# ================== 관리자 반별 비교 ==================
+# 저장소의 주간 롤업(학생 × 주차 합계)만 읽어 반 × 주차 × 그룹 평균을 만듦 (시트 다운로드 없음)
+@st.fragment
+def admin_cohort_compare():
+    st.subheader("🏫 반별 주간 비교")
+    st.caption("저장소에 반영된 기록 기준입니다. 최신 기록은 관리자 탭에서 통계를 생성하면 반영됩니다.")
+
+    with span("aggregate", key="반별 비교"):
+        cube = cohort_cube(load_weekly_rollup(), account_index.students())
+    if cube.empty:
+        st.info("저장소에 기록이 없습니다. 관리자 탭에서 먼저 통계를 생성해 주세요.")
+        return
+
+    cohorts = sorted(cube["반"].unique())
+    selected_cohorts = st.multiselect("반 선택", cohorts, default=cohorts, key="cohort_select")
+    selected_group = st.selectbox("그룹 선택", list(GROUPS.keys()), index=1, key="cohort_group")
+
+    week_nums = sorted(cube["주차번호"].unique())
+    labels = dict(zip(cube["주차번호"], cube["주차"]))
+    first_week, last_week = st.select_slider(
+        "주차 범위",
+        options=week_nums,
+        value=(week_nums[0], week_nums[-1]),
+        format_func=lambda n: labels[n],
+        key="cohort_weeks",
+    )
+
+    if not selected_cohorts:
+        st.info("하나 이상의 반을 선택해주세요.")
+        return
+
+    in_range = cube["반"].isin(selected_cohorts) & cube["주차번호"].between(first_week, last_week)
+    view = cube[in_range & (cube["그룹"] == selected_group)]
+
+    fig = go.Figure()
+    for cohort, part in view.groupby("반", sort=True):
+        fig.add_trace(go.Scatter(
+            x=part["주차"], y=part["평균"], mode="lines+markers", name=cohort,
+            customdata=part["학생수"],
+            hovertemplate="%{x}<br>평균 %{y:.2f}시간<br>학생 %{customdata}명",
+        ))
+    fig.update_layout(
+        title=f"반별 {selected_group} 주간 평균 (일 평균 시간)",
+        xaxis_title="주차", yaxis_title="시간", legend_title="반",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("#### 선택 주차 평균 (반 × 그룹)")
+    table = cube[in_range].pivot_table(index="반", columns="그룹", values="평균", aggfunc="mean", sort=False)
+    st.dataframe(table[list(GROUPS)].round(2), use_container_width=True)
+
+
+# ================== 관리자 진단 ==================
+# 단계별 소요 시간 (시트 다운로드 / 파싱 / 헤더 정리 / 저장 / 집계 / 그림 / 내보내기)
+@st.fragment
+def admin_diagnostics():
+    st.subheader("🩺 단계별 처리 시간")
+    st.caption("이 서버 프로세스가 시작된 뒤 기록된 시간입니다 (ms). " + " → ".join(STAGES))
+
+    summary = timing_log.summary()
+    if summary.empty:
+        st.info("아직 기록이 없습니다. 통계를 생성하거나 학생 페이지를 열면 쌓입니다.")
+        return
+
+    st.markdown("#### 단계별 p50 / p95")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    st.markdown("#### 🐢 느린 시트 (중앙값 기준 상위 10)")
+    st.dataframe(timing_log.slowest_sheets(10), use_container_width=True, hide_index=True)
+
+    st.markdown("#### 최근 페이지 실행")
+    st.dataframe(timing_log.runs(20), use_container_width=True, hide_index=True)
+
+    st.markdown("#### 🔁 시트 자동 갱신")
+    if prefetcher.interval > 0:
+        st.caption(f"{prefetcher.interval}초마다 · 초당 최대 {prefetcher.rate:g}개 · 완료한 바퀴 {prefetcher.passes}")
+        st.dataframe(prefetcher.status(), use_container_width=True, hide_index=True)
+    else:
+        st.caption("꺼져 있음 (LMS_PREFETCH_INTERVAL=0)")
 
-        pc_selected = "toggle-btn-selected" if st.session_state["device"] == "PC" else ""
-        mobile_selected = "toggle-btn-selected" if st.session_state["device"] == "모바일" else ""
+    st.markdown("#### 💾 메모리 (기록 표)")
+    st.caption("세션 표는 지금 접속 중인 학생들이 들고 있는 표입니다 (일시 인덱스, float32).")
+    st.dataframe(
+        memory_report({"학생 세션 표": live_frames.frames(), "시트 캐시 (원본)": sheet_cache.values()}),
+        use_container_width=True, hide_index=True
+    )
 
-        col1, col2 = st.columns(2)
-    
-        with col1:
-            if st.button("💻 PC(컴퓨터, 노트북)", key="pc_btn"):
-                st.session_state["device"] = "PC"
+    st.markdown("#### 🧾 시트 헤더 양식")
+    st.caption(
+        f"같은 헤더 양식은 한 번만 정리합니다 · 재사용 {schema_registry.hits} / 새 양식 {schema_registry.misses}"
+    )
+    st.dataframe(schema_registry.report(), use_container_width=True, hide_index=True)
 
-        with col2:
-            if st.button("📱 모바일(핸드폰, 태블릿)", key="mobile_btn"):
-                st.session_state["device"] = "모바일"
+    if st.button("🧹 기록 지우기", key="admin_timing_clear"):
+        timing_log.clear()
+        st.rerun(scope="fragment")
 
-        st.markdown("</div>", unsafe_allow_html=True)
 
-        # ------------------ 화면 전환 ------------------
-        device = st.session_state["device"]
-        st.markdown('미리보기는 PC버전입니다. 모바일로 입력하려면 모바일 버튼을 눌러주세요.')
+# ================== 학생 탭 ==================
+# 각 탭은 fragment 로 분리: 탭 안의 위젯을 바꾸면 그 탭만 다시 실행됨
+# 시트/저장소 데이터는 페이지 실행 때 한 번 불러와서 인자로 넘김
 
-        # Google Sheet url 가져오기
-        sheet_url = None
-        try:
-            df_sheets = pd.read_csv(SHEETS_FILE, dtype=str)
-            row = df_sheets[df_sheets["id"] == st.session_state["user_id"]]
-            if row.empty:
-                st.warning("시트가 연결되지 않았습니다.")
-                st.stop()
-            sheet_url = row.iloc[0]["sheet_url"]
-        except:
-            st.warning("시트 정보를 불러올 수 없습니다.")
-            st.stop()
+# 시트 캐시 → 저장소 → (df_csv, goals)
+def load_student_data(current_user_id, sheet):
+    # [시트 새로고침] 을 누른 경우 캐시를 무시하고 전체 다시 반영
+    refresh_sheet = st.session_state.pop("sheet_refresh", False)
+    sheet_id = sheet["sheet_id"]
 
-        if device == "PC":
-            try:
-                pc_url = sheet_url + "&widget=true&headers=true"
-                st.components.v1.html(
-                    f"<iframe src='{pc_url}' style='width:100%; height:600px; border:none; border-radius:12px;'></iframe>",
-                    height=600
-                )
-            except Exception as e:
-                st.warning(f"iframe 렌더링 실패: {e}")
+    try:
+        df_raw = get_sheet(sheet_id, refresh=refresh_sheet)
 
-        else:
-            st.markdown(
-                f"<a class='open-sheet-btn' href='{sheet_url}' target='_blank'>📄 Google Sheet 새 탭에서 열기</a>",
-                unsafe_allow_html=True
-            )
-            
-        sheet_id = sheet_url.split("/d/")[1].split("/")[0]
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
+        # 새로 받은 시트일 때만 저장소에 반영 (백그라운드에서 이미 반영한 버전이면 건너뜀)
+        sheet_version = sheet_cache.version(sheet_id)
+        already_stored = sheet_version in (
+            st.session_state.get("stored_sheet_version"), prefetcher.stored_version(current_user_id)
+        )
+        if refresh_sheet or not already_stored:
+            with span("store", key=current_user_id):
+                upsert_sheet(current_user_id, df_raw, full=refresh_sheet)
+        # 건너뛴 경우에도 갱신: 탭의 그림 캐시 키가 이 값이라 예전 버전이면 예전 그림을 보여 줌
+        st.session_state["stored_sheet_version"] = sheet_version
 
-        try:
-            df_csv = pd.read_csv(csv_url, engine='python', on_bad_lines='skip')
-            # 컬럼 정규화
-            df_csv.columns = (
-                df_csv.columns
-                .str.strip()
-                .str.replace('\r','',regex=False)
-                .str.replace('\n','',regex=False)
-                .str.replace(' ','',regex=False)
-                .str.replace('　','',regex=False)
-            )
-            df_csv["일시"] = pd.to_datetime(df_csv["일시"], errors="coerce")
-            df_csv = df_csv.dropna(subset=["일시"])
-            st.session_state["df_csv"] = df_csv
-            goals = {}
-            for var in ALL_VARS:
-                goals[var] = float(df_csv.get(var, [0])[0])
-                goals["수면합"]=float(df_csv.get("수면(시간)", [0])[0])  
-                goals["공부총합"]=float(df_csv.get("전체합(시간)", [0])[0])
-        except:
-            st.warning("CSV 로드 실패")
-
-        # 날짜 범위 선택
-        st.markdown("---")
-        st.subheader("📊 시각화를 위한 기간 선택")
-        try:
-            df_csv["일시"] = pd.to_datetime(df_csv["일시"], errors='coerce')
-            df_csv = df_csv.dropna(subset=["일시"])
-        except:
-            st.error("❌ '일시' 컬럼 날짜 변환 실패.")
-
-        min_date = df_csv["일시"].min().date()
-        max_date = df_csv["일시"].max().date()
-
-        # 기본값: 오늘 기준 1주일 전 ~ 오늘
-        today = datetime.date.today()
-        default_start = max(today - datetime.timedelta(days=7), min_date)
-        default_end = min(today, max_date)
-
-        # 범위가 유효하지 않으면 데이터의 첫 날짜부터 8일
-        if default_start > max_date or default_end < min_date:
-            default_start = min_date
-            default_end = min(min_date + datetime.timedelta(days=7), max_date)
-
-        start_date = st.date_input(
-            "📅 시작 날짜",
-            value=default_start,
-            min_value=min_date,
-            max_value=max_date,
-            key='start_date_picker'
-            )
-        end_date = st.date_input(
-            "📅 종료 날짜",
-            value=default_end,
-            min_value=min_date,
-            max_value=max_date,
-            key='end_date_picker'
-            )
+        with span("load", key=current_user_id):
+            # 세션이 들고 있는 표는 작게 (일시 인덱스, float32)
+            df_csv = live_frames.track(student_frame(load_rows([current_user_id])))
+            # 목표는 시트 버전마다 한 번만 읽어 float64 레코드로 보관
+            goals = student_goals(current_user_id, sheet_version)
+    except Exception:
+        st.warning("CSV 로드 실패")
+        st.stop()
 
-        min_date = df_csv["일시"].min()
-        max_date = df_csv["일시"].max()
-        
-        if start_date > end_date:
-            st.warning("⚠ 종료 날짜가 시작 날짜보다 빠를 수 없습니다.")
+    if df_csv.empty:
+        st.warning("시트에 날짜가 있는 기록이 없습니다.")
+        st.stop()
 
-        df_range = df_csv[
-            (df_csv["일시"] >= pd.to_datetime(start_date)) &
-            (df_csv["일시"] <= pd.to_datetime(end_date))
-        ]
+    return df_csv, goals
 
-        st.markdown("---")
-        st.subheader("선택 날짜 범위 데이터")
-        # 원하는 컬럼만 선택
-        display_cols = [
-        "일시", "낮잠(시간)", "밤잠(시간)", "수면(시간)", "문학(시간)", "비문학(시간)", "화언(시간)", "국어기타(시간)", "국어합(시간)",
-        "대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)", "수학합(시간)",
-        "어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)", "영어합(시간)",
-        "통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)", "탐구합(시간)", "전체합(시간)"]
-        
-        df_display = df_range.copy()
 
-        # 일시 컬럼을 yyyy-mm-dd 형식으로 변환
-        df_display["일시"] = df_display["일시"].dt.strftime("%Y-%m-%d")
+# 표 보기용: 일시는 yyyy-mm-dd, 값은 소수 둘째 자리
+def display_frame(df_range):
+    df_display = as_float64(df_range[[col for col in DISPLAY_COLS if col in df_range.columns]]).round(2)
+    df_display.index = df_display.index.strftime("%Y-%m-%d")
+    return df_display
 
-        # 선택한 컬럼만 남기기
-        df_display = df_display[[col for col in display_cols if col in df_display.columns]]
-        df_display = df_display.round(2)
-        st.dataframe(df_display)
-    
-        # ------------------ 그룹 + 변수 선택 ------------------
-        st.markdown("---")
-        st.subheader("그룹 선택 및 변수 선택")
-        selected_group = st.selectbox("그룹 선택", list(GROUPS.keys()))
-        variables = GROUPS[selected_group]
-        selected_vars = st.multiselect("변수 선택", variables, default=variables)
-    
-        if not selected_vars:
-            st.info("하나 이상의 변수를 선택해주세요.")
 
-        # ------------------ 누적 막대 그래프 ------------------
-        st.markdown("---")
-        st.subheader("📊 누적 막대 그래프")
-        fig = go.Figure()
-        for var in selected_vars:
-            fig.add_trace(go.Bar(
-                y=df_range["일시"].dt.strftime("%Y-%m-%d"),
-                x=pd.to_numeric(df_range[var], errors='coerce').fillna(0),
-                orientation='h',
-                name=var,
-                text=pd.to_numeric(df_range[var], errors='coerce').fillna(0).round(2),
-                texttemplate='%{text}',
-                textposition='inside',
-                hovertemplate='(%{y}) %{x:.2f}시간<extra></extra>'
-            ))
-        fig.update_layout(
-            barmode='stack',
-            xaxis_title="시간(시간)",
-            yaxis_title="날짜",
-            yaxis={'autorange':'reversed'},
-            height=600,
-            template="plotly_white",
-            legend_traceorder='normal',
-            colorway=px.colors.qualitative.Pastel
-        )
-        fig.update_traces(textfont_size=14)
+# ---------------- TAB 1 ----------------
+@st.fragment
+def tab_direct_range(current_user_id, sheet, df_csv, goals):
+    st.subheader("직접 기간 선택")
+    st.write("직접 시작일과 종료일을 선택해서 차트를 볼 수 있습니다.")
+    st.markdown("<div class='section-title'>📱 화면 환경 선택</div>", unsafe_allow_html=True)
 
-        st.plotly_chart(fig, use_container_width=True)
+    # 저장된 선택값 유지
+    if "device" not in st.session_state:
+        st.session_state["device"] = "PC"
 
-        # ------------------ 목표 대비 실천 그래프 ------------------
-        st.markdown("---")
-        st.subheader("🎯 목표 대비 실천 비교")
+    # ------------------ 토글 버튼 랜더링 ------------------
+    st.markdown("<div class='toggle-container'>", unsafe_allow_html=True)
 
-        # --- 안전한 수치 변환 (문자열/빈값 대비) ---
-        goal_raw = df_csv[selected_vars].iloc[0]  # 원래 코드
-        goal_num = goal_raw.apply(pd.to_numeric, errors='coerce')  # NaN 허용
-        avg_num = df_range[selected_vars].apply(pd.to_numeric, errors='coerce').mean()
-    
-        # --- 리스트 생성: 텍스트, hover_text, color 등 ---
-        avg_texts = []
-        avg_hover = []
-        goal_texts = []
-        goal_hover = []
-        colors_dynamic = []
-
-        for var in selected_vars:
-            g = goal_num.get(var, np.nan)
-            a = avg_num.get(var, np.nan)
-
-            # 평균 텍스트 (항상 표시)
-            if pd.isna(a):
-                avg_text = ""
-                avg_hover_text = f"({var}) 실천: -"
-            else:
-                avg_text = f"{a:.2f}"
-                avg_hover_text = f"({var}) 실천: {a:.2f}시간"
-
-            # 목표 텍스트
-            if pd.isna(g):
-                goal_text = ""
-                goal_hover_text = f"({var}) 목표: -"
-            else:
-                goal_text = f"{g:.2f}"
-                goal_hover_text = f"({var}) 목표: {g:.2f}시간"
-
-            # 목표가 0 또는 NaN이면 퍼센트 표시 안함, 색은 중립(회색)
-            if pd.isna(g) or g == 0:
-                pct_part = ""  # 퍼센트 표시 없음
-                colors_dynamic.append("#9e9e9e")  # gray for undefined target
-                # hover에 퍼센트 없음
-                avg_hover_text += ""
-            else:
-                # 퍼센트 계산 (평균이 NaN이면 NaN 처리)
-                pct = ((a) / g * 100) if (not pd.isna(a)) else np.nan
-                if pd.isna(pct):
-                    pct_part = ""
-                else:
-                    pct_part = f" ({pct:+.1f}%)"  # + / - 포함해서 표시
-                # 색: 달성(녹색) vs 미달(빨강)
-                if not pd.isna(a) and a >= g:
-                    colors_dynamic.append("#2ecc71")  # green
-                else:
-                    colors_dynamic.append("#e74c3c")  # red
-    
-                avg_hover_text += f"<br>목표 대비: {pct:+.1f}%"
+    pc_selected = "toggle-btn-selected" if st.session_state["device"] == "PC" else ""
+    mobile_selected = "toggle-btn-selected" if st.session_state["device"] == "모바일" else ""
 
-            # 평균 막대 위 텍스트 (h 단위 표기를 기존 스타일에 맞춰 유지)
-            avg_texts.append(f"{avg_text}시간{pct_part}" if avg_text != "" else "")
-            avg_hover.append(avg_hover_text)
+    col1, col2 = st.columns(2)
 
-            # 목표 막대 텍스트 / hover
-            goal_texts.append(f"{goal_text}시간" if goal_text != "" else "")
-            goal_hover.append(goal_hover_text)
-    
-        # --- Plotly 차트 구성 ---
-        fig2 = go.Figure()
-    
-        # 평균값 Bar (개별 색/텍스트/hover 적용)
-        fig2.add_trace(go.Bar(
-            x=selected_vars,
-            y=[float(x) if not pd.isna(x) else 0 for x in avg_num.values],   
-            name="실천",
-            marker_color=colors_dynamic,
-            text=avg_texts,
-            texttemplate='%{text}',
-            textposition='outside',
-            hovertext=avg_hover,
-            hovertemplate='%{hovertext}<extra></extra>'
-        ))
+    with col1:
+        if st.button("💻 PC(컴퓨터, 노트북)", key="pc_btn"):
+            st.session_state["device"] = "PC"
 
-        # 목표값 Bar
-        fig2.add_trace(go.Bar(
-            x=selected_vars,
-            y=[float(x) if not pd.isna(x) else 0 for x in goal_num.values],
-            name="목표",
-            marker_color='orange',
-            text=goal_texts,
-            texttemplate='%{text}',
-            textposition='outside',
-            hovertext=goal_hover,
-            hovertemplate='%{hovertext}<extra></extra>'
-        ))
+    with col2:
+        if st.button("📱 모바일(핸드폰, 태블릿)", key="mobile_btn"):
+            st.session_state["device"] = "모바일"
 
-        # 레이아웃 유지 + 약간의 margin 조정
-        fig2.update_layout(
-            yaxis_title="시간(시간)",
-            xaxis_title="항목",
-            xaxis=dict(tickangle=-45),
-            height=600,
-            barmode='group',
-            template="plotly_white",
-            colorway=px.colors.qualitative.Pastel,
-            margin=dict(l=30, r=30, t=50, b=150)
-        )
+    st.markdown("</div>", unsafe_allow_html=True)
 
-        fig2.update_traces(textfont_size=14)
+    # ------------------ 화면 전환 ------------------
+    device = st.session_state["device"]
+    st.markdown('미리보기는 PC버전입니다. 모바일로 입력하려면 모바일 버튼을 눌러주세요.')
 
-        st.plotly_chart(fig2, use_container_width=True)
+    sheet_url = sheet["sheet_url"]
 
-    # ---------------- TAB 2 ----------------
-    with tab2:
-        st.subheader("주간별 리포트")
-        if "df_csv" not in st.session_state:
-            st.warning("📅 먼저 [직접 기간 선택] 탭에서 데이터를 불러주세요.")
-            st.stop()
-        df_csv = st.session_state["df_csv"]
-
-        # --- State 초기화 ---
-        if "weekly_report_mode" not in st.session_state:
-            st.session_state["weekly_report_mode"] = False
-        if "weekly_period" not in st.session_state:
-            st.session_state["weekly_period"] = None
-
-        # --- 기본 화면: 기간 선택 + 버튼 ---
-        period_name = st.selectbox(
-            "보고 싶은 기간을 선택하세요", 
-            list(PRESET_PERIODS.keys()),
-            key="weekly_period_select"
+    if device == "PC":
+        try:
+            pc_url = sheet_url + "&widget=true&headers=true"
+            st.components.v1.html(
+                f"<iframe src='{pc_url}' style='width:100%; height:600px; border:none; border-radius:12px;'></iframe>",
+                height=600
+            )
+        except Exception as e:
+            st.warning(f"iframe 렌더링 실패: {e}")
+
+    else:
+        st.markdown(
+            f"<a class='open-sheet-btn' href='{sheet_url}' target='_blank'>📄 Google Sheet 새 탭에서 열기</a>",
+            unsafe_allow_html=True
         )
 
-        if st.button("리포트 보기", key="weekly_report_show"):
-            st.session_state["weekly_report_mode"] = True
-            st.session_state["weekly_period"] = period_name
-            st.rerun()
+    # 캐시된 시트를 버리고 Google에서 다시 받기 (모든 탭이 새 데이터를 쓰도록 전체 다시 실행)
+    last_refresh = prefetcher.last_refresh(current_user_id)
+    if last_refresh is not None:
+        st.caption(f"⏱ 시트 자동 갱신: {last_refresh:%H:%M:%S}")
+    if st.button("🔄 시트 새로고침", key="sheet_refresh_btn"):
+        st.session_state["sheet_refresh"] = True
+        st.rerun(scope="app")
+
+    # 날짜 범위 선택
+    st.markdown("---")
+    st.subheader("📊 시각화를 위한 기간 선택")
+
+    min_date = df_csv.index.min().date()
+    max_date = df_csv.index.max().date()
+
+    # 기본값: 오늘 기준 1주일 전 ~ 오늘
+    today = datetime.date.today()
+    default_start = max(today - datetime.timedelta(days=7), min_date)
+    default_end = min(today, max_date)
+
+    # 범위가 유효하지 않으면 데이터의 첫 날짜부터 8일
+    if default_start > max_date or default_end < min_date:
+        default_start = min_date
+        default_end = min(min_date + datetime.timedelta(days=7), max_date)
+
+    start_date = st.date_input(
+        "📅 시작 날짜",
+        value=default_start,
+        min_value=min_date,
+        max_value=max_date,
+        key='start_date_picker'
+        )
+    end_date = st.date_input(
+        "📅 종료 날짜",
+        value=default_end,
+        min_value=min_date,
+        max_value=max_date,
+        key='end_date_picker'
+        )
 
-        # --- 여기부터 리포트 모드 ---
-        if st.session_state["weekly_report_mode"]:
+    if start_date > end_date:
+        st.warning("⚠ 종료 날짜가 시작 날짜보다 빠를 수 없습니다.")
 
-            period_name = st.session_state["weekly_period"]
-            start_str, end_str = PRESET_PERIODS[period_name]
+    # 일시 인덱스로 잘라냄 (사본 없음)
+    df_range = df_csv.loc[pd.to_datetime(start_date):pd.to_datetime(end_date)]
 
-            st.info(f"📌 선택한 기간: **{start_str} ~ {end_str}**")
+    st.markdown("---")
+    st.subheader("선택 날짜 범위 데이터")
+    st.dataframe(display_frame(df_range))
 
-            # 데이터 필터링
-            df_range = df_csv[(df_csv["일시"] >= start_str) & (df_csv["일시"] <= end_str)]
+    # ------------------ 그룹 + 변수 선택 ------------------
+    st.markdown("---")
+    st.subheader("그룹 선택 및 변수 선택")
+    selected_group = st.selectbox("그룹 선택", list(GROUPS.keys()))
+    variables = GROUPS[selected_group]
+    selected_vars = st.multiselect("변수 선택", variables, default=variables)
 
-            display_cols = [
-                "일시", "낮잠(시간)", "밤잠(시간)", "수면(시간)", "문학(시간)", "비문학(시간)",
-                "화언(시간)", "국어기타(시간)", "국어합(시간)",
-                "대수(시간)", "미적(시간)", "확통(시간)", "수학기타(시간)", "수학합(시간)",
-                "어휘문법(시간)", "듣기(시간)", "독해(시간)", "영어기타(시간)", "영어합(시간)",
-                "통사(시간)", "통과(시간)", "탐구기타(시간)", "내신기타(시간)", "탐구합(시간)", "전체합(시간)"
-            ]
+    if not selected_vars:
+        st.info("하나 이상의 변수를 선택해주세요.")
 
-            # 표 출력
-            df_display = df_range.copy()
-            df_display["일시"] = df_display["일시"].dt.strftime("%Y-%m-%d")
-            df_display = df_display[[c for c in display_cols if c in df_display.columns]]
-            df_display = df_display.round(2)
+    # 같은 시트 버전 · 기간 · 변수면 이전에 만든 그림 재사용
+    chart_key = (
+        current_user_id, st.session_state.get("stored_sheet_version"),
+        str(start_date), str(end_date)
+    )
 
-            st.dataframe(df_display, use_container_width=True)
+    # ------------------ 누적 막대 그래프 ------------------
+    st.markdown("---")
+    st.subheader("📊 누적 막대 그래프")
+    fig = stacked_bar_figure(df_range, selected_vars, cache_key=chart_key)
+    st.plotly_chart(fig, use_container_width=True)
 
-            st.markdown("---")
-            st.subheader("그룹 선택 및 변수 선택")
+    # ------------------ 목표 대비 실천 그래프 ------------------
+    st.markdown("---")
+    st.subheader("🎯 목표 대비 실천 비교")
+    fig2 = goal_actual_figure(goals, df_range, selected_vars, cache_key=chart_key)
+    st.plotly_chart(fig2, use_container_width=True)
 
-            selected_group = st.selectbox("그룹 선택(주간 리포트)", list(GROUPS.keys()), key="weekly_group")
-            variables = GROUPS[selected_group]
 
-            selected_vars = st.multiselect(
-                "변수 선택(주간 리포트)", 
-                variables, 
-                default=variables,
-                key="weekly_vars"
-            )
+# ---------------- TAB 2 ----------------
+@st.fragment
+def tab_weekly_report(current_user_id, df_csv, goals):
+    st.subheader("주간별 리포트")
 
-            if not selected_vars:
-                st.info("하나 이상의 변수를 선택해주세요.")
-
-            if df_range.empty:
-                st.warning("선택한 기간에 데이터가 없습니다.")
-         
-            # ------------------ 누적 막대 그래프 ------------------
-            st.markdown("---")
-            st.subheader("📊 누적 막대 그래프")
-            fig = go.Figure()
-            for var in selected_vars:
-                fig.add_trace(go.Bar(
-                    y=df_range["일시"].dt.strftime("%Y-%m-%d"),
-                    x=pd.to_numeric(df_range[var], errors='coerce').fillna(0),
-                    orientation='h',
-                    name=var,
-                    text=pd.to_numeric(df_range[var], errors='coerce').fillna(0).round(2),
-                    texttemplate='%{text}',
-                    textposition='inside',
-                    hovertemplate='(%{y}) %{x:.2f}시간<extra></extra>'
-                ))
-                fig.update_layout(
-                    barmode='stack',
-                    xaxis_title="시간(시간)",
-                    yaxis_title="날짜",
-                    yaxis={'autorange':'reversed'},
-                    height=600,
-                    template="plotly_white",
-                    legend_traceorder='normal',
-                    colorway=px.colors.qualitative.Pastel
-                )
-                fig.update_traces(textfont_size=14)
-            st.plotly_chart(fig, use_container_width=True, key="fig_week_chart")
-            # ------------------ 목표 대비 실천 그래프 ------------------
-            st.markdown("---")
-            st.subheader("🎯 목표 대비 실천 비교")
-    
-            # --- 안전한 수치 변환 (문자열/빈값 대비) ---
-            goal_raw = df_csv[selected_vars].iloc[0]  # 원래 코드
-            goal_num = goal_raw.apply(pd.to_numeric, errors='coerce')  # NaN 허용
-            avg_num = df_range[selected_vars].apply(pd.to_numeric, errors='coerce').mean()
-
-            # --- 리스트 생성: 텍스트, hover_text, color 등 ---
-            avg_texts = []
-            avg_hover = []
-            goal_texts = []
-            goal_hover = []
-            colors_dynamic = []
-            for var in selected_vars:
-                g = goal_num.get(var, np.nan)
-                a = avg_num.get(var, np.nan)
-                # 평균 텍스트 (항상 표시)
-                if pd.isna(a):
-                    avg_text = ""
-                    avg_hover_text = f"({var}) 실천: -"
-                else:
-                    avg_text = f"{a:.2f}"
-                    avg_hover_text = f"({var}) 실천: {a:.2f}시간"
-                # 목표 텍스트
-                if pd.isna(g):
-                    goal_text = ""
-                    goal_hover_text = f"({var}) 목표: -"
-                else:
-                    goal_text = f"{g:.2f}"
-                    goal_hover_text = f"({var}) 목표: {g:.2f}시간"
-
-                 # 목표가 0 또는 NaN이면 퍼센트 표시 안함, 색은 중립(회색)
-                if pd.isna(g) or g == 0:
-                    pct_part = ""  # 퍼센트 표시 없음
-                    colors_dynamic.append("#9e9e9e")  # gray for undefined target
-                    # hover에 퍼센트 없음
-                    avg_hover_text += ""
-                else:
-                    # 퍼센트 계산 (평균이 NaN이면 NaN 처리)
-                    pct = ((a) / g * 100) if (not pd.isna(a)) else np.nan
-                    if pd.isna(pct):
-                        pct_part = ""
-                    else:
-                        pct_part = f" ({pct:+.1f}%)"  # + / - 포함해서 표시
-                    # 색: 달성(녹색) vs 미달(빨강)
-                    if not pd.isna(a) and a >= g:
-                        colors_dynamic.append("#2ecc71")  # green
-                    else:
-                        colors_dynamic.append("#e74c3c")  # red
-        
-                    avg_hover_text += f"<br>목표 대비: {pct:+.1f}%"
-    
-                # 평균 막대 위 텍스트 (h 단위 표기를 기존 스타일에 맞춰 유지)
-                avg_texts.append(f"{avg_text}시간{pct_part}" if avg_text != "" else "")
-                avg_hover.append(avg_hover_text)
-                # 목표 막대 텍스트 / hover
-                goal_texts.append(f"{goal_text}시간" if goal_text != "" else "")
-                goal_hover.append(goal_hover_text)
-
-            # --- Plotly 차트 구성 ---
-            fig2 = go.Figure()
-    
-            # 평균값 Bar (개별 색/텍스트/hover 적용)
-            fig2.add_trace(go.Bar(
-                x=selected_vars,
-                y=[float(x) if not pd.isna(x) else 0 for x in avg_num.values],   
-                name="실천",
-                marker_color=colors_dynamic,
-                text=avg_texts,
-                texttemplate='%{text}',
-                textposition='outside',
-                hovertext=avg_hover,
-                hovertemplate='%{hovertext}<extra></extra>'
-            ))
-    
-            # 목표값 Bar
-            fig2.add_trace(go.Bar(
-                x=selected_vars,
-                y=[float(x) if not pd.isna(x) else 0 for x in goal_num.values],
-                name="목표",
-                marker_color='orange',
-                text=goal_texts,
-                texttemplate='%{text}',
-                textposition='outside',
-                hovertext=goal_hover,
-                hovertemplate='%{hovertext}<extra></extra>'
-            ))
-    
-            # 레이아웃 유지 + 약간의 margin 조정
-            fig2.update_layout(
-                yaxis_title="시간(시간)",
-                xaxis_title="항목",
-                xaxis=dict(tickangle=-45),
-                height=600,
-                barmode='group',
-                template="plotly_white",
-                colorway=px.colors.qualitative.Pastel,
-                margin=dict(l=30, r=30, t=50, b=150)
-            )        
-
-            fig2.update_traces(textfont_size=14)
-  
-            st.plotly_chart(fig2, use_container_width=True, key="fig_w_target_chart")
-
-        st.markdown("### 📝 이번 주 학습 요약")
-
-        summary = make_student_weekly_summary(df_display, goals)
-        st.success(summary[0])
-        st.success(summary[1])
-
-    # ---------------- TAB 3 ----------------
-    with tab3:
-        st.subheader("주간별 평균 변화")
-        if "df_csv" not in st.session_state:
-            st.warning("📅 먼저 [직접 기간 선택] 탭에서 데이터를 불러주세요.")
-            st.stop()
-        
-        df = st.session_state["df_csv"].copy()
-        df["일시"] = pd.to_datetime(df["일시"], errors="coerce")
-        df = df.dropna(subset=["일시"])
-
-        # 기간 선택
-        st.markdown("### 🗓 주차 범위 선택")
-        week_keys = list(PRESET_PERIODS.keys())
-        col1, col2 = st.columns(2)
-
-        with col1:
-            start_week = st.selectbox(
-                "시작 주차",
-                week_keys,
-                index=0,
-                key="tab3_start_week"
-            )
+    # --- State 초기화 ---
+    if "weekly_report_mode" not in st.session_state:
+        st.session_state["weekly_report_mode"] = False
+    if "weekly_period" not in st.session_state:
+        st.session_state["weekly_period"] = None
 
-        with col2:
-            end_week = st.selectbox(
-                "끝 주차",
-                week_keys,
-                index=10,
-                key="tab3_end_week"
-            )
-        # ------------------ 선택 검증 ------------------
-        start_idx = week_keys.index(start_week)
-        end_idx = week_keys.index(end_week)
-    
-        if start_idx > end_idx:
-            st.error("시작 주차는 끝 주차보다 클 수 없습니다.")
-        
-        # ------------------ 날짜 범위 계산 ------------------
-        start_date = pd.to_datetime(PRESET_PERIODS[start_week][0]).normalize()
-        end_date = (
-            pd.to_datetime(PRESET_PERIODS[end_week][1])
-            .normalize()
-            + pd.Timedelta(days=1)
-            - pd.Timedelta(seconds=1)
-        )
+    # --- 기본 화면: 기간 선택 + 버튼 ---
+    period_name = st.selectbox(
+        "보고 싶은 기간을 선택하세요", 
+        list(PRESET_PERIODS.keys()),
+        key="weekly_period_select"
+    )
 
-        st.info(
-            # f"📌 선택 기간: **{start_week} ~ {end_week}**  \n"
-            f"📌 선택 기간: ({start_date.date()} ~ {end_date.date()})"
-        )
+    if st.button("리포트 보기", key="weekly_report_show"):
+        st.session_state["weekly_report_mode"] = True
+        st.session_state["weekly_period"] = period_name
 
-        # ------------------ 데이터 필터 ------------------
-        df_period = df[
-            (df["일시"] >= start_date) &
-            (df["일시"] <= end_date)
-        ]
+    # --- 여기부터 리포트 모드 ---
+    if st.session_state["weekly_report_mode"]:
+
+        period_name = st.session_state["weekly_period"]
+        start_str, end_str = PRESET_PERIODS[period_name]
+
+        st.info(f"📌 선택한 기간: **{start_str} ~ {end_str}**")
+
+        # 데이터 필터링
+        df_range = df_csv.loc[start_str:end_str]
+
+        # 표 출력
+        st.dataframe(display_frame(df_range), use_container_width=True)
+
+        st.markdown("---")
+        st.subheader("그룹 선택 및 변수 선택")
+
+        selected_group = st.selectbox("그룹 선택(주간 리포트)", list(GROUPS.keys()), key="weekly_group")
+        variables = GROUPS[selected_group]
 
-        if df_period.empty:
-            st.warning("선택한 기간에 데이터가 없습니다.")
-       
-        # 그룹 & 변수 선택
-        selected_group = st.selectbox(
-            "그룹 선택 (주간 누적)",
-            list(GROUPS.keys()),
-            key="tab3_group"
-        )
-        
         selected_vars = st.multiselect(
-            "변수 선택 (주간 누적)",
-            GROUPS[selected_group],
-            default=GROUPS[selected_group],
-            key="tab3_vars"
+            "변수 선택(주간 리포트)", 
+            variables, 
+            default=variables,
+            key="weekly_vars"
         )
 
         if not selected_vars:
             st.info("하나 이상의 변수를 선택해주세요.")
-        
-        # ------------------ 주차 기준 테이블 생성 ------------------
-        week_rows = []
-
-        for week_name, (start, end) in PRESET_PERIODS.items():
-            week_num = int(week_name.split("주차")[0])
-            week_rows.append({
-                "주차번호": week_num,
-                "주차": week_name,
-                "start": pd.to_datetime(start),
-                "end": pd.to_datetime(end)
-            })
-
-        df_weeks = pd.DataFrame(week_rows)
-
-        # ------------------ 날짜 → 주차 매핑 ------------------
-        df_period = df_period.copy()
-        df_period["주차번호"] = np.nan
-        df_period["주차"] = ""
-        df_period["주차번호"] = df_period["주차번호"].astype("float")
-
-        for _, row in df_weeks.iterrows():
-            mask = (
-                (df_period["일시"] >= row["start"]) &
-                (df_period["일시"] <= row["end"])
-            )
-            df_period.loc[mask, "주차번호"] = row["주차번호"]
-            df_period.loc[mask, "주차"] = row["주차"]
-
-        start_week_num = int(start_week.split("주차")[0])
-        end_week_num = int(end_week.split("주차")[0])
-      
-        df_period = df_period[
-            (df_period["주차번호"] >= start_week_num) &
-            (df_period["주차번호"] <= end_week_num)
-        ]
 
-        # 주차별 평균
-        weekly_avg = (
-            df_period
-            .groupby(["주차번호", "주차"])[selected_vars]
-            .mean()
-            .reset_index()
-            .sort_values("주차번호")
-        )
+        if df_range.empty:
+            st.warning("선택한 기간에 데이터가 없습니다.")
 
-        # 누적 막대 그래프
-        fig = go.Figure()
-
-        for var in selected_vars:
-            fig.add_trace(go.Bar(
-                y=weekly_avg["주차"],
-                x=pd.to_numeric(weekly_avg[var], errors="coerce").fillna(0),
-                orientation="h",
-                name=var,
-                text=pd.to_numeric(weekly_avg[var], errors="coerce").fillna(0).round(2),
-                texttemplate="%{text}",
-                textposition="inside",
-                hovertemplate=(
-                    f"{var}<br>"
-                    "주차: %{y}<br>"
-                    "합계: %{x:.2f}시간"
-                    "<extra></extra>"
-                )
-            ))
-
-        fig.update_layout(
-            barmode="stack",
-            xaxis_title="주간 평균 시간(시간)",
-            yaxis_title="주차",
-            yaxis=dict(autorange="reversed"),
-            height=600,
-            template="plotly_white",
-            legend_title="변수",
-            margin=dict(l=40, r=40, t=60, b=80)
+        chart_key = (
+            current_user_id, st.session_state.get("stored_sheet_version"),
+            start_str, end_str
         )
 
-        fig.update_traces(textfont_size=13)
+        # ------------------ 누적 막대 그래프 ------------------
+        st.markdown("---")
+        st.subheader("📊 누적 막대 그래프")
+        fig = stacked_bar_figure(df_range, selected_vars, cache_key=chart_key)
+        st.plotly_chart(fig, use_container_width=True, key="fig_week_chart")
+        # ------------------ 목표 대비 실천 그래프 ------------------
+        st.markdown("---")
+        st.subheader("🎯 목표 대비 실천 비교")
+        fig2 = goal_actual_figure(goals, df_range, selected_vars, cache_key=chart_key)
+        st.plotly_chart(fig2, use_container_width=True, key="fig_w_target_chart")
 
-        st.plotly_chart(fig, use_container_width=True)
+    st.markdown("### 📝 이번 주 학습 요약")
 
-    # ---------------- TAB 4 ----------------
-    with tab4:
-        st.subheader("🏆 주간 공부 시간 순위")
+    # 리포트 모드면 선택한 주차, 아니면 [직접 기간 선택] 탭의 기간 기준
+    if st.session_state["weekly_report_mode"]:
+        df_summary = df_range
+    else:
+        df_summary = df_csv.loc[
+            pd.to_datetime(st.session_state.get("start_date_picker")):
+            pd.to_datetime(st.session_state.get("end_date_picker"))
+        ]
 
-    # ===============================
-    # 주차 선택
-    # ===============================
-        week_options = {
-                "1주차 (3/1~3/7)": "rank20260301_20260307.xlsx",
-                "2주차 (3/8~3/14)": "rank20260308_20260314.xlsx",
-                "3주차 (3/15~3/21)": "rank20260315_20260321.xlsx"
-        }
-
-        selected_week = st.selectbox(
-            "주간 선택",
-            list(week_options.keys())
+    summary = make_student_weekly_summary(df_summary, goals)
+    if isinstance(summary, str):
+        st.info(summary)
+    else:
+        for line in summary:
+            st.success(line)
+
+
+# ---------------- TAB 3 ----------------
+@st.fragment
+def tab_weekly_trend(current_user_id, df_csv):
+    st.subheader("주간별 평균 변화")
+    df = df_csv
+
+    # 기간 선택
+    st.markdown("### 🗓 주차 범위 선택")
+    week_keys = list(PRESET_PERIODS.keys())
+    col1, col2 = st.columns(2)
+
+    with col1:
+        start_week = st.selectbox(
+            "시작 주차",
+            week_keys,
+            index=0,
+            key="tab3_start_week"
         )
 
-        file_name = week_options[selected_week]
-        file_url = f"{BASE_GITHUB_URL}/{file_name}"
-
-        try:
-        # ===============================
-        # 파일 로드
-        # ===============================
-            df = pd.read_excel(file_url)
-            
-            if df.empty:
-                raise ValueError
-        # ===============================
-        # (3) 전 주 대비 변화
-        # ===============================
-            week_keys = list(week_options.keys())
-            cur_idx = week_keys.index(selected_week)
+    with col2:
+        end_week = st.selectbox(
+            "끝 주차",
+            week_keys,
+            index=10,
+            key="tab3_end_week"
+        )
+    # ------------------ 선택 검증 ------------------
+    start_idx = week_keys.index(start_week)
+    end_idx = week_keys.index(end_week)
+
+    if start_idx > end_idx:
+        st.error("시작 주차는 끝 주차보다 클 수 없습니다.")
+
+    # ------------------ 날짜 범위 계산 ------------------
+    start_date = pd.to_datetime(PRESET_PERIODS[start_week][0]).normalize()
+    end_date = (
+        pd.to_datetime(PRESET_PERIODS[end_week][1])
+        .normalize()
+        + pd.Timedelta(days=1)
+        - pd.Timedelta(seconds=1)
+    )
+
+    st.info(
+        # f"📌 선택 기간: **{start_week} ~ {end_week}**  \n"
+        f"📌 선택 기간: ({start_date.date()} ~ {end_date.date()})"
+    )
+
+    # ------------------ 데이터 필터 ------------------
+    df_period = df.loc[start_date:end_date]
+
+    if df_period.empty:
+        st.warning("선택한 기간에 데이터가 없습니다.")
+
+    # 그룹 & 변수 선택
+    selected_group = st.selectbox(
+        "그룹 선택 (주간 누적)",
+        list(GROUPS.keys()),
+        key="tab3_group"
+    )
+
+    selected_vars = st.multiselect(
+        "변수 선택 (주간 누적)",
+        GROUPS[selected_group],
+        default=GROUPS[selected_group],
+        key="tab3_vars"
+    )
+
+    if not selected_vars:
+        st.info("하나 이상의 변수를 선택해주세요.")
+
+    # ------------------ 날짜 → 주차 매핑 ------------------
+    df_period = add_week_columns(df_period[selected_vars].reset_index())
+
+    start_week_num = WEEK_NUMBERS[start_week]
+    end_week_num = WEEK_NUMBERS[end_week]
+
+    df_period = df_period[
+        (df_period["주차번호"] >= start_week_num) &
+        (df_period["주차번호"] <= end_week_num)
+    ]
+
+    # 주차별 평균
+    weekly_avg = (
+        df_period
+        .groupby(["주차번호", "주차"], observed=True)[selected_vars]
+        .mean()
+        .pipe(as_float64)
+        .reset_index()
+        .sort_values("주차번호")
+    )
+
+    # 누적 막대 그래프
+    fig = go.Figure()
+
+    for var in selected_vars:
+        fig.add_trace(go.Bar(
+            y=weekly_avg["주차"],
+            x=pd.to_numeric(weekly_avg[var], errors="coerce").fillna(0),
+            orientation="h",
+            name=var,
+            text=pd.to_numeric(weekly_avg[var], errors="coerce").fillna(0).round(2),
+            texttemplate="%{text}",
+            textposition="inside",
+            hovertemplate=(
+                f"{var}<br>"
+                "주차: %{y}<br>"
+                "합계: %{x:.2f}시간"
+                "<extra></extra>"
+            )
+        ))
 
-            if cur_idx > 0:
-                prev_file = week_options[week_keys[cur_idx - 1]]
-                prev_url = f"{BASE_GITHUB_URL}/{prev_file}"
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title="주간 평균 시간(시간)",
+        yaxis_title="주차",
+        yaxis=dict(autorange="reversed"),
+        height=600,
+        template="plotly_white",
+        legend_title="변수",
+        margin=dict(l=40, r=40, t=60, b=80)
+    )
+
+    fig.update_traces(textfont_size=13)
+
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ------------------ 이동 평균 · 연속 달성 ------------------
+    # 전체 기록으로 계산한 뒤 선택 기간만 표시 (기간 첫날의 28일 평균도 이전 기록을 반영)
+    st.markdown("---")
+    st.subheader("📈 이동 평균 · 연속 달성")
+    metric = st.radio("항목", list(DAILY_TARGETS), horizontal=True, key="tab3_rolling_metric")
+    target = DAILY_TARGETS[metric]
+    st.caption(f"연속 달성: 하루 {metric} {target:.1f}시간 이상인 날이 이어진 일수 (기록이 없는 날은 끊김)")
+
+    trends = rolling_trends(df).loc[start_date:end_date]
+    if trends.empty:
+        st.info("선택한 기간에 데이터가 없습니다.")
+        return
+
+    streaks = trends[f"{metric} 연속 달성"]
+    col1, col2 = st.columns(2)
+    col1.metric("기간 마지막 날 연속 달성", f"{int(streaks.iloc[-1])}일")
+    col2.metric("기간 중 최장 연속 달성", f"{int(streaks.max())}일")
+
+    chart_key = (
+        current_user_id, st.session_state.get("stored_sheet_version"),
+        str(start_date.date()), str(end_date.date())
+    )
+    fig = rolling_trend_figure(trends, metric, target, cache_key=chart_key)
+    st.plotly_chart(fig, use_container_width=True, key="tab3_rolling_chart")
+
+
+# ---------------- TAB 4 ----------------
+@st.fragment
+def tab_weekly_rank(current_user_id):
+    st.subheader("🏆 주간 공부 시간 순위")
 
-                try:
-                    df_prev = pd.read_excel(prev_url)
-                    prev_map = dict(
-                        zip(df_prev["학생ID"], df_prev["공부총합"])
-                    )
+    # ===============================
+    # 주차 선택
+    # ===============================
+    # 전체 주차 순위 이력 (순위 파일이 바뀔 때만 다시 계산)
+    history = rank_cache.history()
+    week_labels = list(dict.fromkeys(history["주차"]))
 
-                    def diff_arrow(row):
-                        prev = prev_map.get(row["학생ID"])
-                        if prev is None:
-                            return "—"
-                        if row["공부총합"] > prev:
-                            return "▲"
-                        if row["공부총합"] < prev:
-                            return "▼"
-                        return "—"
+    selected_week = st.selectbox(
+        "주간 선택",
+        week_labels
+    )
 
-                    df["변화"] = df.apply(diff_arrow, axis=1)
+    try:
+        df = history[history["주차"] == selected_week].copy()
 
-                except:
-                    df["변화"] = "—"
-            else:
-                df["변화"] = "—"
+        if df.empty:
+            raise ValueError
+        df["순위변화"] = format_rank_delta(df["순위변화"])
 
         # ===============================
         # 표시용 테이블
         # ===============================
-            show_df = df[["학생ID","순위", "익명", "공부총합", "변화"]].copy()
-            show_df = show_df.sort_values(["순위", "익명"], ascending=[True, True])
-            show_df["학생ID"]=show_df["학생ID"].astype(str).str.strip()
-            my_id = str(st.session_state.get("user_id").strip())
-            my_row = show_df.loc[show_df["학생ID"] == my_id]
-
-            display_df = show_df[["순위", "익명", "공부총합", "변화"]].copy()
-
-            def highlight_my_row(row):
-                if show_df.loc[row.name, "학생ID"] == my_id:
-                    return ["background-color: #993333; color: white; font-weight: bold"] * len(row)
-                return [""] * len(row)
-
-            styled = (
-                display_df
-                .style
-                .apply(highlight_my_row, axis=1)
-                .set_properties(**{"text-align": "center"})
-                .format({"공부총합": "{:.2f}"})
-            )
+        show_df = df[["학생ID","순위", "익명", "공부총합", "변화", "순위변화"]].copy()
+        show_df = show_df.sort_values(["순위", "익명"], ascending=[True, True])
+        show_df["학생ID"]=show_df["학생ID"].astype(str).str.strip()
+        my_id = str(current_user_id).strip()
+        my_row = show_df.loc[show_df["학생ID"] == my_id]
+
+        display_df = show_df[["순위", "익명", "공부총합", "변화", "순위변화"]].copy()
+
+        def highlight_my_row(row):
+            if show_df.loc[row.name, "학생ID"] == my_id:
+                return ["background-color: #993333; color: white; font-weight: bold"] * len(row)
+            return [""] * len(row)
+
+        styled = (
+            display_df
+            .style
+            .apply(highlight_my_row, axis=1)
+            .set_properties(**{"text-align": "center"})
+            .format({"공부총합": "{:.2f}"})
+        )
+
+        st.dataframe(
+            styled,
+            use_container_width=True,
+            hide_index=True
+        )
 
-            st.dataframe(
-                styled,
-                use_container_width=True,
-                hide_index=True
+        if not my_row.empty:
+            r = int(my_row["순위"].iloc[0])
+            avg = round(my_row["공부총합"].iloc[0], 2)
+            arrow = my_row["변화"].iloc[0]
+            total = len(df)
+
+            st.success(
+                f"🙋‍♂️ 학생은 **{total}명 중 {r}위**입니다.\n\n"
+                f"📚 주간 평균 공부 시간: **{avg}시간** (변화 : {arrow}, 순위 {my_row['순위변화'].iloc[0]})"
             )
-                        
-            if not my_row.empty:
-                r = int(my_row["순위"].iloc[0])
-                avg = round(my_row["공부총합"].iloc[0], 2)
-                arrow = my_row["변화"].iloc[0]
-                total = len(df)
-                
-                st.success(
-                    f"🙋‍♂️ 학생은 **{total}명 중 {r}위**입니다.\n\n"
-                    f"📚 주간 평균 공부 시간: **{avg}시간** (변화 : {arrow})"
+
+            # 내 순위 추이
+            my_history = history[history["학생ID"] == my_id]
+            if len(my_history) > 1:
+                fig_rank = go.Figure(go.Scatter(
+                    x=my_history["주차"].str.split(" ").str[0],
+                    y=my_history["순위"],
+                    mode="lines+markers+text",
+                    text=my_history["순위"],
+                    textposition="top center",
+                    hovertemplate="%{x}: %{y}위<extra></extra>"
+                ))
+                fig_rank.update_layout(
+                    title="📈 내 순위 추이",
+                    yaxis=dict(autorange="reversed", title="순위", dtick=1),
+                    height=250,
+                    template="plotly_white",
+                    margin=dict(l=30, r=30, t=40, b=30)
                 )
+                st.plotly_chart(fig_rank, use_container_width=True, key="fig_rank_trend")
+
+    except Exception:
+        st.info("📭 아직 주간 순위가 없습니다.")
 
-        except Exception:
-            st.info("📭 아직 주간 순위가 없습니다.")
-    
-    # 로그아웃
-    if st.button("🔙 로그아웃"):
-        st.session_state.clear()
-        st.rerun()
 
 # ================== 앱 진입 ==================
 def app():
+    # 시트 미리 받기 스레드 (프로세스당 한 번만 시작)
+    prefetcher.start()
+
     if "logged_in" not in st.session_state:
         st.session_state["logged_in"] = False
 
     if not st.session_state["logged_in"]:
         login_page()
     else:
-        student_page()
+        # 페이지 실행 한 번 = 진단 탭의 "실행" 한 줄
+        with page_run(st.session_state.get("role", "student")):
+            student_page()
 
 app()